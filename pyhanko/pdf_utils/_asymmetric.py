@@ -0,0 +1,117 @@
+"""
+Internal RSA helpers for public-key encryption.
+
+The keys returned by the ``load_*`` functions in this module are opaque
+handles that should only be passed back into :func:`rsa_pkcs1v15_encrypt` and
+:func:`rsa_pkcs1v15_decrypt`. If pyca/cryptography is available, they are
+pyca/cryptography key objects, since RSA operations through its OpenSSL
+bindings are considerably cheaper than through oscrypto.
+Otherwise, oscrypto is used as-is.
+
+:func:`load_pkcs12` returns the private key as an oscrypto key object
+(as used by :class:`~pyhanko.pdf_utils.crypt.SimpleEnvelopeKeyDecrypter`),
+the certificate, and a handle for the private key as described above.
+"""
+
+from functools import lru_cache
+
+from asn1crypto import keys, x509
+from oscrypto import asymmetric, keys as oskeys
+
+__all__ = [
+    'load_rsa_public_key', 'load_rsa_private_key',
+    'rsa_pkcs1v15_encrypt', 'rsa_pkcs1v15_decrypt', 'load_pkcs12'
+]
+
+try:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import padding
+    from cryptography.hazmat.primitives.serialization import pkcs12
+except ImportError:  # pragma: nocover
+    serialization = None
+
+
+def _private_key_info(private_key) -> keys.PrivateKeyInfo:
+    # accept both asn1crypto private keys and oscrypto's key objects
+    if isinstance(private_key, asymmetric.PrivateKey):
+        return private_key.asn1
+    return private_key
+
+
+@lru_cache(maxsize=128)
+def _load_rsa_public_key_der(pubkey_der: bytes):
+    return serialization.load_der_public_key(pubkey_der)
+
+
+def _load_rsa_public_key(pubkey: keys.PublicKeyInfo):
+    # Key objects are immutable, so when the same recipients are used
+    # repeatedly (e.g. for a batch of documents), there's no need to parse
+    # their public keys every time.
+    return _load_rsa_public_key_der(pubkey.dump())
+
+
+def _load_rsa_private_key(private_key):
+    return serialization.load_der_private_key(
+        _private_key_info(private_key).dump(), password=None
+    )
+
+
+def _rsa_pkcs1v15_encrypt(public_key, data: bytes) -> bytes:
+    return public_key.encrypt(data, padding.PKCS1v15())
+
+
+def _rsa_pkcs1v15_decrypt(private_key, data: bytes) -> bytes:
+    return private_key.decrypt(data, padding.PKCS1v15())
+
+
+def _check_pkcs12_contents(private_key, cert):
+    if private_key is None:
+        raise ValueError("PKCS#12 file does not contain a private key")
+    if cert is None:
+        raise ValueError("PKCS#12 file does not contain a certificate")
+
+
+def _load_pkcs12(pfx_bytes: bytes, passphrase=None):
+    if isinstance(passphrase, str):
+        passphrase = passphrase.encode('utf-8')
+    # let OpenSSL handle the key derivation and decryption
+    private_key, cert, _ = pkcs12.load_key_and_certificates(
+        pfx_bytes, passphrase
+    )
+    _check_pkcs12_contents(private_key, cert)
+    encoding = serialization.Encoding.DER
+    key_info = keys.PrivateKeyInfo.load(
+        private_key.private_bytes(
+            encoding, serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        )
+    )
+    cert = x509.Certificate.load(cert.public_bytes(encoding))
+    return asymmetric.load_private_key(key_info), cert, private_key
+
+
+def _oscrypto_load_pkcs12(pfx_bytes: bytes, passphrase=None):
+    key_info, cert, _ = oskeys.parse_pkcs12(pfx_bytes, passphrase)
+    _check_pkcs12_contents(key_info, cert)
+    private_key = asymmetric.load_private_key(key_info)
+    return private_key, cert, private_key
+
+
+def _oscrypto_load_rsa_private_key(private_key):
+    if isinstance(private_key, asymmetric.PrivateKey):
+        return private_key
+    return asymmetric.load_private_key(private_key)
+
+
+if serialization is not None:
+    load_rsa_public_key = _load_rsa_public_key
+    load_rsa_private_key = _load_rsa_private_key
+    rsa_pkcs1v15_encrypt = _rsa_pkcs1v15_encrypt
+    rsa_pkcs1v15_decrypt = _rsa_pkcs1v15_decrypt
+    load_pkcs12 = _load_pkcs12
+else:  # pragma: nocover
+    load_rsa_public_key = asymmetric.load_public_key
+    load_rsa_private_key = _oscrypto_load_rsa_private_key
+    rsa_pkcs1v15_encrypt = asymmetric.rsa_pkcs1v15_encrypt
+    rsa_pkcs1v15_decrypt = asymmetric.rsa_pkcs1v15_decrypt
+    load_pkcs12 = _oscrypto_load_pkcs12
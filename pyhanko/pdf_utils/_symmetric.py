@@ -0,0 +1,139 @@
+"""
+Internal symmetric cryptography helpers.
+
+The functions in this module mirror the signatures of their counterparts in
+:mod:`oscrypto.symmetric`. If pyca/cryptography is available, the work is
+delegated to it, since its per-call overhead is considerably lower than
+oscrypto's, which matters when the same primitive is invoked many times in a
+row (e.g. in the PDF 2.0 password hashing algorithm, or when processing
+a document with lots of encrypted objects).
+Otherwise, the oscrypto implementations are used as-is.
+"""
+
+import os
+
+from oscrypto import symmetric
+
+__all__ = [
+    'aes_cbc_no_padding_encrypt', 'aes_cbc_no_padding_decrypt',
+    'aes_cbc_pkcs7_encrypt', 'aes_cbc_pkcs7_decrypt', 'rc4_encrypt',
+    'aes_ecb_encrypt_block', 'aes_ecb_decrypt_block'
+]
+
+try:
+    from cryptography.hazmat.primitives import padding
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+except ImportError:  # pragma: nocover
+    Cipher = None
+
+
+def _load_arc4():
+    # RC4 was moved to the "decrepit" module in later versions
+    # of pyca/cryptography
+    try:
+        from cryptography.hazmat.decrepit.ciphers.algorithms import ARC4
+    except ImportError:  # pragma: nocover
+        try:
+            ARC4 = algorithms.ARC4
+        except AttributeError:
+            return None
+    # The OpenSSL build that pyca/cryptography is linked against may not
+    # support RC4 at all, so probe for it
+    try:
+        Cipher(ARC4(bytes(5)), mode=None).encryptor()
+    except Exception:  # pragma: nocover
+        return None
+    return ARC4
+
+
+def _check_block_multiple(data: bytes):
+    if len(data) % 16 != 0:
+        raise ValueError(
+            f"data must be a multiple of 16 bytes long - is {len(data)}"
+        )
+
+
+def _aes_cbc_no_padding_encrypt(key: bytes, data: bytes, iv: bytes):
+    if not iv:
+        iv = os.urandom(16)
+    _check_block_multiple(data)
+    encryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).encryptor()
+    return iv, encryptor.update(data) + encryptor.finalize()
+
+
+def _aes_cbc_no_padding_decrypt(key: bytes, data: bytes, iv: bytes):
+    _check_block_multiple(data)
+    decryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).decryptor()
+    return decryptor.update(data) + decryptor.finalize()
+
+
+def _aes_cbc_pkcs7_encrypt(key: bytes, data: bytes, iv: bytes):
+    if not iv:
+        iv = os.urandom(16)
+    padder = padding.PKCS7(128).padder()
+    padded = padder.update(data) + padder.finalize()
+    encryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).encryptor()
+    return iv, encryptor.update(padded) + encryptor.finalize()
+
+
+def _aes_cbc_pkcs7_decrypt(key: bytes, data: bytes, iv: bytes):
+    decryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).decryptor()
+    padded = decryptor.update(data) + decryptor.finalize()
+    unpadder = padding.PKCS7(128).unpadder()
+    return unpadder.update(padded) + unpadder.finalize()
+
+
+def _aes_ecb_encrypt_block(key: bytes, block: bytes) -> bytes:
+    assert len(block) == 16
+    return Cipher(algorithms.AES(key), modes.ECB()).encryptor().update(block)
+
+
+def _aes_ecb_decrypt_block(key: bytes, block: bytes) -> bytes:
+    assert len(block) == 16
+    return Cipher(algorithms.AES(key), modes.ECB()).decryptor().update(block)
+
+
+# oscrypto doesn't do ECB, but one block of CBC with an all-zero IV is
+# equivalent to one block of ECB.
+
+def _oscrypto_aes_ecb_encrypt_block(key: bytes, block: bytes) -> bytes:
+    assert len(block) == 16
+    # oscrypto's OpenSSL-based implementation of aes_cbc_no_padding_encrypt
+    # requires padding to encrypt a single 16-byte block if the key size is
+    # larger than 16 bytes, so we request padding and cut the result off
+    # after the first block. This is OK, because the first 16 bytes aren't
+    # affected by the rest of the encrypted string.
+    _, ciphertext = symmetric.aes_cbc_pkcs7_encrypt(key, block, bytes(16))
+    return ciphertext[:16]
+
+
+def _oscrypto_aes_ecb_decrypt_block(key: bytes, block: bytes) -> bytes:
+    assert len(block) == 16
+    return symmetric.aes_cbc_no_padding_decrypt(key, block, bytes(16))
+
+
+def _rc4_encrypt(key: bytes, data: bytes):
+    return Cipher(_ARC4(key), mode=None).encryptor().update(data)
+
+
+if Cipher is not None:
+    aes_cbc_no_padding_encrypt = _aes_cbc_no_padding_encrypt
+    aes_cbc_no_padding_decrypt = _aes_cbc_no_padding_decrypt
+    aes_cbc_pkcs7_encrypt = _aes_cbc_pkcs7_encrypt
+    aes_cbc_pkcs7_decrypt = _aes_cbc_pkcs7_decrypt
+    aes_ecb_encrypt_block = _aes_ecb_encrypt_block
+    aes_ecb_decrypt_block = _aes_ecb_decrypt_block
+    _ARC4 = _load_arc4()
+else:  # pragma: nocover
+    aes_cbc_no_padding_encrypt = symmetric.aes_cbc_no_padding_encrypt
+    aes_cbc_no_padding_decrypt = symmetric.aes_cbc_no_padding_decrypt
+    aes_cbc_pkcs7_encrypt = symmetric.aes_cbc_pkcs7_encrypt
+    aes_cbc_pkcs7_decrypt = symmetric.aes_cbc_pkcs7_decrypt
+    aes_ecb_encrypt_block = _oscrypto_aes_ecb_encrypt_block
+    aes_ecb_decrypt_block = _oscrypto_aes_ecb_decrypt_block
+    _ARC4 = None
+
+if _ARC4 is not None:
+    rc4_encrypt = _rc4_encrypt
+else:  # pragma: nocover
+    rc4_encrypt = symmetric.rc4_encrypt
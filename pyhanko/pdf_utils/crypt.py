@@ -54,21 +54,23 @@ As long as you don't require access to encoded object data and/or raw encrypted
 object data, this distiction should be irrelevant to you as an API user.
 """
 
+import hmac
 import logging
 import abc
-import struct
-import secrets
+import os
 import enum
 from dataclasses import dataclass
+from functools import lru_cache
 from hashlib import md5, sha256, sha384, sha512, sha1
-from typing import Dict, Type, Optional, Tuple, Union, List, Set
+from typing import Dict, Type, Optional, Tuple, Union, List, Set, Iterable
 
 from asn1crypto import x509, cms
 from asn1crypto.algos import EncryptionAlgorithmId
 from asn1crypto.keys import PublicKeyAlgorithm, PrivateKeyInfo
 from oscrypto import symmetric, asymmetric, keys as oskeys
 
-from . import generic, misc
+from . import generic, misc, _symmetric, _asymmetric
+from ._saslprep import saslprep
 
 __all__ = [
     'SecurityHandler', 'StandardSecurityHandler', 'PubKeySecurityHandler',
@@ -91,6 +93,46 @@ _encryption_padding = (
     b'\xa9\xfe\x64\x53\x69\x7a'
 )
 
+# All-zero IV used in the PDF 2.0 key derivation and /UE, /OE computations
+_ZERO_IV = bytes(16)
+
+
+def _pad_password(password: bytes) -> bytes:
+    # Pad or truncate a password to 32 bytes, as described in step 1 of
+    # algorithm 3.2.
+    pw_len = len(password)
+    if pw_len >= 32:
+        return password[:32]
+    return password + _encryption_padding[:32 - pw_len]
+
+
+# Translation tables mapping each byte b to b ^ i, for i in 0..19.
+# Used to derive the auxiliary RC4 keys for the legacy /O and /U values,
+# and to invert that computation when authenticating the owner.
+_RC4_KEY_XOR_TABLES = tuple(
+    bytes(b ^ i for b in range(256)) for i in range(20)
+)
+
+
+def _rc4_cascade(key: bytes, data: bytes, rounds: Iterable[int]) -> bytes:
+    # Repeatedly RC4-encrypt data, using the key XOR'ed with the round number
+    # in each iteration. Note that every round requires a distinct key, so
+    # there's no key schedule to share between rounds.
+    rc4 = _symmetric.rc4_encrypt
+    for i in rounds:
+        data = rc4(key.translate(_RC4_KEY_XOR_TABLES[i]), data)
+    return data
+
+
+def _md5_iterate(md5_hash: bytes, n: int, rounds: int = 50) -> bytes:
+    # Repeatedly replace md5_hash by the MD5 digest of its first n bytes.
+    # This is the key-stretching step shared by algorithms 3.2 and 3.3.
+    # The loop body is tiny, so avoid a global lookup in every iteration.
+    _md5 = md5
+    for _ in range(rounds):
+        md5_hash = _md5(md5_hash[:n]).digest()
+    return md5_hash
+
 
 # Implementation of algorithm 3.2 of the PDF standard security handler,
 # section 3.5.2 of the PDF 1.6 reference.
@@ -101,7 +143,7 @@ def _derive_legacy_file_key(password, rev, keylen, owner_entry, p_entry,
     # if it is less than 32 bytes long, pad it by appending the required number
     # of additional bytes from the beginning of the padding string
     # (_encryption_padding).
-    password = (password + _encryption_padding)[:32]
+    password = _pad_password(password)
     # 2. Initialize the MD5 hash function and pass the result of step 1 as
     # input to this function.
     m = md5(password)
@@ -110,7 +152,7 @@ def _derive_legacy_file_key(password, rev, keylen, owner_entry, p_entry,
     m.update(owner_entry)
     # 4. Treat the value of the /P entry as an unsigned 4-byte integer and pass
     # these bytes to the MD5 hash function, low-order byte first.
-    p_entry = struct.pack('<i', p_entry)
+    p_entry = p_entry.to_bytes(4, 'little', signed=True)
     m.update(p_entry)
     # 5. Pass the first element of the file's file identifier array to the MD5
     # hash function.
@@ -127,8 +169,7 @@ def _derive_legacy_file_key(password, rev, keylen, owner_entry, p_entry,
     # encryption key as defined by the value of the encryption dictionary's
     # /Length entry.
     if rev >= 3:
-        for i in range(50):
-            md5_hash = md5(md5_hash[:keylen]).digest()
+        md5_hash = _md5_iterate(md5_hash, keylen)
     # 9. Set the encryption key to the first n bytes of the output from the
     # final MD5 hash, where n is always 5 for revision 2 but, for revision 3 or
     # greater, depends on the value of the encryption dictionary's /Length
@@ -138,14 +179,17 @@ def _derive_legacy_file_key(password, rev, keylen, owner_entry, p_entry,
 
 @dataclass
 class _R6KeyEntry:
-    hash_value: bytes
-    validation_salt: bytes
-    key_salt: bytes
+    hash_value: memoryview
+    validation_salt: memoryview
+    key_salt: memoryview
 
     @classmethod
     def from_bytes(cls, entry: bytes) -> '_R6KeyEntry':
         assert len(entry) == 48
-        return _R6KeyEntry(entry[:32], entry[32:40], entry[40:48])
+        # the parts are only ever fed to hashlib or compared to other byte
+        # strings, so there's no need to copy them out of the original
+        view = memoryview(entry)
+        return _R6KeyEntry(view[:32], view[32:40], view[40:48])
 
 
 def _legacy_normalise_pw(password: Union[str, bytes]) -> bytes:
@@ -157,7 +201,6 @@ def _legacy_normalise_pw(password: Union[str, bytes]) -> bytes:
 
 def _r6_normalise_pw(password: Union[str, bytes]) -> bytes:
     if isinstance(password, str):
-        from ._saslprep import saslprep
         password = saslprep(password).encode('utf-8')
     return password[:127]
 
@@ -172,22 +215,11 @@ def _r6_derive_file_key(pw_bytes: bytes, entry: _R6KeyEntry, e_entry: bytes,
                         u_entry: Optional[bytes] = None):
     interm_key = _r6_hash_algo(pw_bytes, entry.key_salt, u_entry)
     assert len(e_entry) == 32
-    return symmetric.aes_cbc_no_padding_decrypt(
-        key=interm_key, data=e_entry, iv=bytes(16)
+    return _symmetric.aes_cbc_no_padding_decrypt(
+        key=interm_key, data=e_entry, iv=_ZERO_IV
     )
 
 
-_EXPECTED_PERMS_8 = {
-    0x54: True,  # 'T'
-    0x46: False  # 'F'
-}
-
-
-def _bytes_mod_3(input_bytes: bytes):
-    # 256 is 1 mod 3, so we can just sum 'em
-    return sum(b % 3 for b in input_bytes) % 3
-
-
 # Algorithm 2.B in ISO 32000-2 § 7.6.4.3.4
 def _r6_hash_algo(pw_bytes: bytes, current_salt: bytes,
                   u_entry: Optional[bytes] = None) -> bytes:
@@ -197,19 +229,27 @@ def _r6_hash_algo(pw_bytes: bytes, current_salt: bytes,
     if u_entry:
         assert len(u_entry) == 48
         initial_hash.update(u_entry)
+    else:
+        # Normalise once, so the round loop treats both cases uniformly
+        # (an empty suffix costs nothing in the join below)
+        u_entry = b''
     k = initial_hash.digest()
     hashes = (sha256, sha384, sha512)
+    # The round loop below runs at least 64 times, so keep the amount of
+    # interpreter work per round to a minimum: bind everything we need
+    # to locals and let the C-level primitives do the heavy lifting.
+    aes_encrypt = _symmetric.aes_cbc_no_padding_encrypt
     round_no = last_byte_val = 0
     while round_no < 64 or last_byte_val > round_no - 32:
-        k1 = (pw_bytes + k + (u_entry or b'')) * 64
-        e = symmetric.aes_cbc_no_padding_encrypt(
-            key=k[:16], data=k1, iv=k[16:32]
-        )[1]
+        # Note: the length of k depends on the hash function selected in the
+        # previous round, so there's no fixed layout to preallocate.
+        # Assemble the unit in one go and let bytes.__mul__ replicate it.
+        k1 = b''.join((pw_bytes, k, u_entry)) * 64
+        e = aes_encrypt(k[:16], k1, k[16:32])[1]
         # compute the first 16 bytes of e, interpreted as an unsigned integer
-        # mod 3
-        next_hash = hashes[_bytes_mod_3(e[:16])]
-        k = next_hash(e).digest()
-        last_byte_val = e[len(e) - 1]
+        # mod 3, and hash e with the corresponding function
+        k = hashes[int.from_bytes(e[:16], 'big') % 3](e).digest()
+        last_byte_val = e[-1]
         round_no += 1
     return k[:32]
 
@@ -221,10 +261,10 @@ def _compute_o_value_legacy(owner_pwd, user_pwd, rev, keylen):
     key = _compute_o_value_legacy_prep(owner_pwd, rev, keylen)
     # 5. Pad or truncate the user password string as described in step 1 of
     # algorithm 3.2.
-    user_pwd = (user_pwd + _encryption_padding)[:32]
+    user_pwd = _pad_password(user_pwd)
     # 6. Encrypt the result of step 5, using an RC4 encryption function with
     # the encryption key obtained in step 4.
-    val = symmetric.rc4_encrypt(key, user_pwd)
+    val = _symmetric.rc4_encrypt(key, user_pwd)
     # 7. (Revision 3 or greater) Do the following 19 times: Take the output
     # from the previous invocation of the RC4 function and pass it as input to
     # a new invocation of the function; use an encryption key generated by
@@ -232,9 +272,7 @@ def _compute_o_value_legacy(owner_pwd, user_pwd, rev, keylen):
     # an XOR operation between that byte and the single-byte value of the
     # iteration counter (from 1 to 19).
     if rev >= 3:
-        for i in range(1, 20):
-            new_key = bytes(b ^ i for b in key)
-            val = symmetric.rc4_encrypt(new_key, val)
+        val = _rc4_cascade(key, val, range(1, 20))
     # 8. Store the output from the final invocation of the RC4 as the value of
     # the /O entry in the encryption dictionary.
     return val
@@ -245,7 +283,7 @@ def _compute_o_value_legacy_prep(password, rev, keylen):
     # 1. Pad or truncate the owner password string as described in step 1 of
     # algorithm 3.2.  If there is no owner password, use the user password
     # instead.
-    password = (password + _encryption_padding)[:32]
+    password = _pad_password(password)
     # 2. Initialize the MD5 hash function and pass the result of step 1 as
     # input to this function.
     m = md5(password)
@@ -253,8 +291,7 @@ def _compute_o_value_legacy_prep(password, rev, keylen):
     # from the previous MD5 hash and pass it as input into a new MD5 hash.
     md5_hash = m.digest()
     if rev >= 3:
-        for i in range(50):
-            md5_hash = md5(md5_hash).digest()
+        md5_hash = _md5_iterate(md5_hash, 16)
     # 4. Create an RC4 encryption key using the first n bytes of the output
     # from the final MD5 hash, where n is always 5 for revision 2 but, for
     # revision 3 or greater, depends on the value of the encryption
@@ -273,7 +310,7 @@ def _compute_u_value_r2(password, owner_entry, p_entry, id1_entry):
     # 2. Encrypt the 32-byte padding string shown in step 1 of algorithm 3.2,
     # using an RC4 encryption function with the encryption key from the
     # preceding step.
-    u = symmetric.rc4_encrypt(key, _encryption_padding)
+    u = _symmetric.rc4_encrypt(key, _encryption_padding)
     # 3. Store the result of step 2 as the value of the /U entry in the
     # encryption dictionary.
     return u, key
@@ -299,23 +336,21 @@ def _compute_u_value_r34(password, rev, keylen, owner_entry, p_entry,
     md5_hash = m.digest()
     # 4. Encrypt the 16-byte result of the hash, using an RC4 encryption
     # function with the encryption key from step 1.
-    val = symmetric.rc4_encrypt(key, md5_hash)
+    val = _symmetric.rc4_encrypt(key, md5_hash)
     # 5. Do the following 19 times: Take the output from the previous
     # invocation of the RC4 function and pass it as input to a new invocation
     # of the function; use an encryption key generated by taking each byte of
     # the original encryption key (obtained in step 2) and performing an XOR
     # operation between that byte and the single-byte value of the iteration
     # counter (from 1 to 19).
-    for i in range(1, 20):
-        new_key = bytes(b ^ i for b in key)
-        val = symmetric.rc4_encrypt(new_key, val)
+    val = _rc4_cascade(key, val, range(1, 20))
     # 6. Append 16 bytes of arbitrary padding to the output from the final
     # invocation of the RC4 function and store the 32-byte result as the value
     # of the U entry in the encryption dictionary.
     # (implementer note: I don't know what "arbitrary padding" is supposed to
     # mean, so I have used null bytes.  This seems to match a few other
     # people's implementations)
-    return val + (b'\x00' * 16), key
+    return val.ljust(32, b'\x00'), key
 
 
 def legacy_derive_object_key(shared_key: bytes, idnum: int, generation: int,
@@ -333,16 +368,21 @@ def legacy_derive_object_key(shared_key: bytes, idnum: int, generation: int,
         Boolean indicating whether the security handler uses RC4 or AES(-128).
     :return:
     """
-    pack1 = struct.pack("<i", idnum)[:3]
-    pack2 = struct.pack("<i", generation)[:2]
-    key = shared_key + pack1 + pack2
-    assert len(key) == (len(shared_key) + 5)
-    if use_aes:
-        key += b'sAlT'
+    key = shared_key + _legacy_object_key_suffix(idnum, generation, use_aes)
     md5_hash = md5(key).digest()
     return md5_hash[:min(16, len(shared_key) + 5)]
 
 
+def _legacy_object_key_suffix(idnum: int, generation: int, use_aes) -> bytes:
+    # the low-order 3 bytes of the object number and the low-order 2 bytes
+    # of the generation number, low-order byte first
+    return b''.join((
+        (idnum & 0xffffff).to_bytes(3, 'little'),
+        (generation & 0xffff).to_bytes(2, 'little'),
+        b'sAlT' if use_aes else b''
+    ))
+
+
 class AuthResult(misc.OrderedEnum):
     """
     Describes the result of an authentication
@@ -405,6 +445,7 @@ class SecurityHandler:
     """
 
     __registered_subclasses: Dict[str, Type['SecurityHandler']] = dict()
+    __subfilter_index: Dict[str, Type['SecurityHandler']] = dict()
 
     def __init__(self, version: SecurityHandlerVersion, legacy_keylen,
                  crypt_filter_config: 'CryptFilterConfiguration',
@@ -440,6 +481,11 @@ class SecurityHandler:
         # don't put this in __init_subclass__, so that people can inherit from
         # security handlers if they want
         SecurityHandler.__registered_subclasses[cls.get_name()] = cls
+        # index the generic subfilters up front, so build() doesn't have to
+        # go through all registered handlers.
+        # The first handler to claim a subfilter wins.
+        for subfilter in cls.support_generic_subfilters():
+            SecurityHandler.__subfilter_index.setdefault(subfilter, cls)
         return cls
 
     @staticmethod
@@ -479,11 +525,8 @@ class SecurityHandler:
                     f"/SubFilter entry."
                 )
             try:
-                cls = next(
-                    h for h in SecurityHandler.__registered_subclasses.values()
-                    if subfilter in h.support_generic_subfilters()
-                )
-            except StopIteration:
+                cls = SecurityHandler.__subfilter_index[subfilter]
+            except KeyError:
                 raise misc.PdfReadError(
                     f"There is no security handler named {handler_name}, and "
                     f"none of the available handlers support the declared "
@@ -604,8 +647,16 @@ class CryptFilter:
     the API supports mixin usage so code can be shared.
     """
 
+    is_identity: bool = False
+    """
+    Indicates whether this crypt filter leaves all data unchanged, in which
+    case callers may skip key derivation and encryption/decryption altogether.
+    """
+
     _handler: 'SecurityHandler' = None
     _shared_key: Optional[bytes] = None
+    _object_key_cache: Optional[Dict[Tuple[int, int], bytes]] = None
+    _object_key_md5 = None
 
     def _set_security_handler(self, handler):
         """
@@ -615,6 +666,7 @@ class CryptFilter:
         """
         self._handler = handler
         self._shared_key = None
+        self._object_key_cache = self._object_key_md5 = None
 
     @property
     def _auth_failed(self) -> bool:
@@ -732,6 +784,30 @@ class CryptFilter:
         """
         raise NotImplementedError
 
+    def _legacy_object_key(self, idnum, generation, use_aes=False) -> bytes:
+        # Memoised version of legacy_derive_object_key.
+        # The local key only depends on the object's ID and generation number
+        # once the shared key is fixed, and the same objects tend to be
+        # encrypted/decrypted many times over.
+        cache = self._object_key_cache
+        if cache is None:
+            # The shared key is the same for all objects, so we can feed it
+            # to MD5 once, and only hash the per-object suffix afterwards.
+            shared_key = self.shared_key
+            self._object_key_md5 = (
+                md5(shared_key), min(16, len(shared_key) + 5)
+            )
+            cache = self._object_key_cache = {}
+        try:
+            return cache[idnum, generation]
+        except KeyError:
+            pass
+        md, keylen = self._object_key_md5
+        md = md.copy()
+        md.update(_legacy_object_key_suffix(idnum, generation, use_aes))
+        key = cache[idnum, generation] = md.digest()[:keylen]
+        return key
+
     @property
     def shared_key(self) -> bytes:
         """
@@ -783,6 +859,8 @@ class PubKeyCryptFilter(CryptFilter, abc.ABC):
         self.encrypt_metadata = encrypt_metadata
         self._pubkey_auth_failed = False
         self._shared_key = self._recp_key_seed = None
+        self._dumped_recipients: Optional[List[bytes]] = None
+        self._recp_by_rid = None
         super().__init__(**kwargs)
 
     @property
@@ -795,6 +873,37 @@ class PubKeyCryptFilter(CryptFilter, abc.ABC):
         super()._set_security_handler(handler)
         self._shared_key = self._recp_key_seed = None
 
+    def _recipient_dumps(self) -> List[bytes]:
+        # both the key derivation and the serialisation logic need the
+        # DER encoding of all recipient CMS objects, so only compute it once
+        dumped = self._dumped_recipients
+        if dumped is None:
+            dumped = self._dumped_recipients = [
+                recp.dump() for recp in self.recipients
+            ]
+        return dumped
+
+    def _recipient_index(self) \
+            -> Optional[Dict[Tuple[str, int], List[cms.ContentInfo]]]:
+        # Index the recipient CMS objects by the issuer and serial number
+        # of the certificates they're addressed to, so we don't have to
+        # walk all of them on every authentication attempt.
+        # If one of them can't be indexed, return None and let the caller
+        # fall back to trying them in order.
+        index = self._recp_by_rid
+        if index is None:
+            index = {}
+            for recp in self.recipients:
+                rids = _recipient_ids(recp)
+                if rids is None:
+                    return None
+                for rid in rids:
+                    recps = index.setdefault(rid, [])
+                    if not recps or recps[-1] is not recp:
+                        recps.append(recp)
+            self._recp_by_rid = index
+        return index
+
     def add_recipients(self, certs: List[x509.Certificate]):
         # this always adds one full CMS object to the Recipients array
 
@@ -806,7 +915,7 @@ class PubKeyCryptFilter(CryptFilter, abc.ABC):
         if self.recipients is None:
             # assume that this is a freshly created pubkey crypt filter,
             # so set up the shared seed
-            self._recp_key_seed = secrets.token_bytes(20)
+            self._recp_key_seed = os.urandom(20)
             self.recipients = []
 
         if self._shared_key is not None or self._recp_key_seed is None:
@@ -821,9 +930,18 @@ class PubKeyCryptFilter(CryptFilter, abc.ABC):
             include_permissions=self.acts_as_default
         )
         self.recipients.append(new_cms)
+        self._dumped_recipients = self._recp_by_rid = None
 
     def authenticate(self, credential) -> AuthResult:
-        for recp in self.recipients:
+        index = self._recipient_index()
+        if index is None:
+            candidates = self.recipients
+        else:
+            cert = credential.cert
+            candidates = index.get(
+                (cert.issuer.hashable, cert.serial_number), ()
+            )
+        for recp in candidates:
             seed = read_seed_from_recipient_cms(recp, credential)
             if seed is not None:
                 self._recp_key_seed = seed
@@ -834,28 +952,27 @@ class PubKeyCryptFilter(CryptFilter, abc.ABC):
         if self._recp_key_seed is None:
             raise misc.PdfError("No seed available; authenticate first.")
         if self._handler.version == SecurityHandlerVersion.AES256:
-            md = sha256()
+            md = sha256
         else:
-            md = sha1()
-        md.update(self._recp_key_seed)
-        for recp in self.recipients:
-            md.update(recp.dump())
+            md = sha1
+        # assemble the input first, and hash it in one go
+        key_input = [self._recp_key_seed]
+        key_input.extend(self._recipient_dumps())
         if not self.encrypt_metadata:
-            md.update(b'\xff\xff\xff\xff')
-        return md.digest()[:self.keylen]
+            key_input.append(b'\xff\xff\xff\xff')
+        return md(b''.join(key_input)).digest()[:self.keylen]
 
     def as_pdf_object(self):
         result = super().as_pdf_object()
         result['/Length'] = generic.NumberObject(self.keylen * 8)
-        recipients = generic.ArrayObject(
-            generic.ByteStringObject(recp.dump())
-            for recp in self.recipients
-        )
+        dumps = self._recipient_dumps()
         if self.acts_as_default:
-            result['/Recipients'] = recipients
+            result['/Recipients'] = generic.ArrayObject(
+                [generic.ByteStringObject(dumped) for dumped in dumps]
+            )
         else:
             # non-default crypt filters can only have one recipient object
-            result['/Recipients'] = recipients[0]
+            result['/Recipients'] = generic.ByteStringObject(dumps[0])
         result['/EncryptMetadata'] \
             = generic.BooleanObject(self.encrypt_metadata)
         return result
@@ -873,6 +990,7 @@ class IdentityCryptFilter(CryptFilter, metaclass=misc.Singleton):
 
     method = generic.NameObject('/None')
     keylen = 0
+    is_identity = True
     _auth_failed = False
 
     def derive_shared_encryption_key(self) -> bytes:
@@ -969,7 +1087,7 @@ class RC4CryptFilterMixin(CryptFilter, abc.ABC):
         :return:
             Ciphertext.
         """
-        return symmetric.rc4_encrypt(key, plaintext)
+        return _symmetric.rc4_encrypt(key, plaintext)
 
     def decrypt(self, key, ciphertext: bytes, params=None) -> bytes:
         """
@@ -984,7 +1102,7 @@ class RC4CryptFilterMixin(CryptFilter, abc.ABC):
         :return:
             Plaintext.
         """
-        return symmetric.rc4_encrypt(key, ciphertext)
+        return _symmetric.rc4_encrypt(key, ciphertext)
 
     def derive_object_key(self, idnum, generation) -> bytes:
         """
@@ -998,7 +1116,7 @@ class RC4CryptFilterMixin(CryptFilter, abc.ABC):
         :return:
             The local key.
         """
-        return legacy_derive_object_key(self.shared_key, idnum, generation)
+        return self._legacy_object_key(idnum, generation)
 
 
 class AESCryptFilterMixin(CryptFilter, abc.ABC):
@@ -1030,8 +1148,8 @@ class AESCryptFilterMixin(CryptFilter, abc.ABC):
             The resulting ciphertext, prepended with a 16-byte initialisation
             vector.
         """
-        iv, ciphertext = symmetric.aes_cbc_pkcs7_encrypt(
-            key, plaintext, secrets.token_bytes(16)
+        iv, ciphertext = _symmetric.aes_cbc_pkcs7_encrypt(
+            key, plaintext, os.urandom(16)
         )
         return iv + ciphertext
 
@@ -1050,7 +1168,7 @@ class AESCryptFilterMixin(CryptFilter, abc.ABC):
             The resulting plaintext.
         """
         iv, data = ciphertext[:16], ciphertext[16:]
-        return symmetric.aes_cbc_pkcs7_decrypt(key, data, iv)
+        return _symmetric.aes_cbc_pkcs7_decrypt(key, data, iv)
 
     def derive_object_key(self, idnum, generation) -> bytes:
         """
@@ -1070,11 +1188,11 @@ class AESCryptFilterMixin(CryptFilter, abc.ABC):
             The local key.
         """
         if self._handler.version >= SecurityHandlerVersion.AES256:
-            return self.shared_key
+            # This runs for every object, so skip the property machinery
+            # if the shared key is already available.
+            return self._shared_key or self.shared_key
         else:
-            return legacy_derive_object_key(
-                self.shared_key, idnum, generation, use_aes=True
-            )
+            return self._legacy_object_key(idnum, generation, use_aes=True)
 
 
 class StandardAESCryptFilter(StandardCryptFilter, AESCryptFilterMixin):
@@ -1122,6 +1240,13 @@ IDENTITY = generic.NameObject('/Identity')
 Name of the identity crypt filter.
 """
 
+# IdentityCryptFilter is a singleton, so we can grab the instance once
+_IDENTITY_FILTER = IdentityCryptFilter()
+
+
+def _resolve_filter(name, crypt_filters) -> CryptFilter:
+    return _IDENTITY_FILTER if name == IDENTITY else crypt_filters[name]
+
 
 class CryptFilterConfiguration:
     """
@@ -1146,31 +1271,33 @@ class CryptFilterConfiguration:
     def __init__(self, crypt_filters: Dict[str, CryptFilter] = None,
                  default_stream_filter=IDENTITY, default_string_filter=IDENTITY,
                  default_file_filter=None):
-        def _select(name) -> CryptFilter:
-            return (
-                IdentityCryptFilter() if name == IDENTITY
-                else crypt_filters[name]
-            )
-
         self._crypt_filters = crypt_filters
         self._default_string_filter_name = default_string_filter
         self._default_stream_filter_name = default_stream_filter
         self._default_file_filter_name = default_file_filter
-        self._default_stream_filter = _select(default_stream_filter)
-        self._default_string_filter = _select(default_string_filter)
+        self._default_stream_filter = _resolve_filter(
+            default_stream_filter, crypt_filters
+        )
+        self._default_string_filter = _resolve_filter(
+            default_string_filter, crypt_filters
+        )
         default_file_filter = default_file_filter or default_stream_filter
-        self._default_file_filter = _select(default_file_filter)
+        self._default_file_filter = _resolve_filter(
+            default_file_filter, crypt_filters
+        )
+        # the defaults can't change after construction, and security
+        # handlers consult these on every authentication attempt
+        self._default_filters = frozenset(
+            (self._default_stream_filter, self._default_string_filter)
+        )
 
     def __getitem__(self, item):
-        if item == generic.NameObject('/Identity'):
-            return IdentityCryptFilter()
+        if item == IDENTITY:
+            return _IDENTITY_FILTER
         return self._crypt_filters[item]
 
     def __contains__(self, item):
-        return (
-            item == generic.NameObject('/Identity')
-            or item in self._crypt_filters
-        )
+        return item == IDENTITY or item in self._crypt_filters
 
     def filters(self):
         """Enumerate all crypt filters in this configuration."""
@@ -1224,8 +1351,10 @@ class CryptFilterConfiguration:
         result['/StrF'] = self._default_string_filter_name
         if self._default_file_filter_name is not None:
             result['/EFF'] = self._default_file_filter_name
+        # the keys are usually NameObjects already, only wrap them if not
         result['/CF'] = generic.DictionaryObject({
-            generic.NameObject(key): value.as_pdf_object()
+            (key if isinstance(key, generic.NameObject)
+             else generic.NameObject(key)): value.as_pdf_object()
             for key, value in self._crypt_filters.items() if key != IDENTITY
         })
         return result
@@ -1239,11 +1368,9 @@ class CryptFilterConfiguration:
         These sometimes require special treatment (as per the specification).
 
         :return:
-            A set with one or two elements.
+            A (frozen) set with one or two elements.
         """
-        stmf = self._default_stream_filter
-        strf = self._default_string_filter
-        return {stmf, strf} if stmf is not strf else {stmf}
+        return self._default_filters
 
 
 def _std_rc4_config(keylen):
@@ -1358,51 +1485,44 @@ class StandardSecurityHandler(SecurityHandler):
             if desired_user_pass is not None
             else owner_pw_bytes
         )
-        encryption_key = secrets.token_bytes(32)
-        u_validation_salt = secrets.token_bytes(8)
-        u_key_salt = secrets.token_bytes(8)
+        # Draw all the random data we need in one go:
+        # the file encryption key, four 8-byte salts and 4 bytes of
+        # filler for the /Perms entry.
+        random_data = os.urandom(32 + 4 * 8 + 4)
+        encryption_key = random_data[:32]
+        u_validation_salt = random_data[32:40]
+        u_key_salt = random_data[40:48]
+        o_validation_salt = random_data[48:56]
+        o_key_salt = random_data[56:64]
+        perms_filler = random_data[64:]
+
         u_hash = _r6_hash_algo(user_pw_bytes, u_validation_salt)
         u_entry = u_hash + u_validation_salt + u_key_salt
         u_interm_key = _r6_hash_algo(user_pw_bytes, u_key_salt)
-        _, ue_seed = symmetric.aes_cbc_no_padding_encrypt(
-            u_interm_key, encryption_key, bytes(16)
+        _, ue_seed = _symmetric.aes_cbc_no_padding_encrypt(
+            u_interm_key, encryption_key, _ZERO_IV
         )
         assert len(ue_seed) == 32
 
-        o_validation_salt = secrets.token_bytes(8)
-        o_key_salt = secrets.token_bytes(8)
         o_hash = _r6_hash_algo(owner_pw_bytes, o_validation_salt, u_entry)
         o_entry = o_hash + o_validation_salt + o_key_salt
         o_interm_key = _r6_hash_algo(owner_pw_bytes, o_key_salt, u_entry)
-        _, oe_seed = symmetric.aes_cbc_no_padding_encrypt(
-            o_interm_key, encryption_key, bytes(16)
+        _, oe_seed = _symmetric.aes_cbc_no_padding_encrypt(
+            o_interm_key, encryption_key, _ZERO_IV
         )
         assert len(oe_seed) == 32
 
         # TODO allow user to set perms
         perms_bytes = b'\xfc\xff\xff\xff'
         extd_perms_bytes = (
-            perms_bytes + (b'\xff' * 4) + b'Tadb' + secrets.token_bytes(4)
-        )
-        perms = struct.unpack('<i', perms_bytes)[0]
-
-        # need to encrypt one 16 byte block in CBC mode with an
-        # IV of 0 (equivalent to 1 block in ECB mode).
-        # FIXME
-        #  oscrypto's OpenSSL-based implementation of aes_cbc_no_padding_encrypt
-        #  requires padding to encrypt a single 16-byte block if the key size is
-        #  larger than 16 bytes. I believe that's a mistake, but since I'm not
-        #  willing to vendor oscrypto, this little hack will have to do.
-
-        # We'll indulge in oscrypto's whims and request padding
-        _, encrypted_perms = symmetric.aes_cbc_pkcs7_encrypt(
-            encryption_key, extd_perms_bytes, bytes(16)
+            perms_bytes + (b'\xff' * 4) + b'Tadb' + perms_filler
         )
+        perms = int.from_bytes(perms_bytes, 'little', signed=True)
 
-        # ... and then cut the result off at 16 bytes
-        # This is OK, because the block size is 16 bytes, so the first 16
-        # bytes aren't affected by the rest of the encrypted string
-        encrypted_perms = encrypted_perms[:16]
+        # need to encrypt one 16 byte block in ECB mode
+        encrypted_perms = _symmetric.aes_ecb_encrypt_block(
+            encryption_key, extd_perms_bytes
+        )
         sh = StandardSecurityHandler(
             version=SecurityHandlerVersion.AES256,
             revision=StandardSecuritySettingsRevision.AES256,
@@ -1455,6 +1575,17 @@ class StandardSecurityHandler(SecurityHandler):
                     "rev. 6 security handler"
                 )  # pragma: nocover
             self.encrypted_perms = encrypted_perms
+            # split these up front, since they don't change between
+            # authentication attempts
+            self._o_entry_split = _R6KeyEntry.from_bytes(odata)
+            self._u_entry_split = _R6KeyEntry.from_bytes(udata)
+            # The bytes of the decrypted /Perms entry that we need to verify:
+            # the permission flags, the /EncryptMetadata flag and
+            # the known plaintext 'adb' mandated by the standard.
+            self._expected_perms = (
+                (perm_flags & 0xffffffff).to_bytes(4, 'little')
+                + (b'Tadb' if encrypt_metadata else b'Fadb')
+            )
         else:
             if not (len(udata) == len(odata) == 32):
                 raise misc.PdfError(
@@ -1462,10 +1593,16 @@ class StandardSecurityHandler(SecurityHandler):
                     "legacy security handler"
                 )  # pragma: nocover
             self.oeseed = self.ueseed = self.encrypted_perms = None
+            self._o_entry_split = self._u_entry_split = None
         self.odata = odata
         self.udata = udata
         self._shared_key = None
         self._auth_failed = False
+        # outcome of the last authentication attempt with an empty password,
+        # together with the document ID it applies to (if relevant)
+        self._empty_pw_auth: Optional[
+            Tuple[Optional[bytes], AuthResult, Optional[bytes]]
+        ] = None
 
     @staticmethod
     def read_standard_cf_dictionary(cfdict):
@@ -1554,7 +1691,8 @@ class StandardSecurityHandler(SecurityHandler):
             result['/Perms'] = generic.ByteStringObject(self.encrypted_perms)
         return result
 
-    def _auth_user_password_legacy(self, id1: bytes, password):
+    def _auth_user_password_legacy(self, id1: bytes, password: bytes) \
+            -> Tuple[bool, bytes]:
         rev = self.revision
         user_token = self.udata
         if rev == StandardSecuritySettingsRevision.RC4_BASIC:
@@ -1570,7 +1708,8 @@ class StandardSecurityHandler(SecurityHandler):
 
         return user_tok_supplied == user_token, key
 
-    def _authenticate_legacy(self, id1: bytes, password):
+    def _authenticate_legacy(self, id1: bytes, password: bytes) \
+            -> Tuple[AuthResult, Optional[bytes]]:
         user_password, key = self._auth_user_password_legacy(id1, password)
         if user_password:
             return AuthResult.USER, key
@@ -1578,40 +1717,52 @@ class StandardSecurityHandler(SecurityHandler):
             rev = self.revision
             key = _compute_o_value_legacy_prep(password, rev.value, self.keylen)
             if rev == StandardSecuritySettingsRevision.RC4_BASIC:
-                userpass = symmetric.rc4_encrypt(key, self.odata)
+                userpass = _symmetric.rc4_encrypt(key, self.odata)
             else:
-                val = self.odata
-                for i in range(19, -1, -1):
-                    new_key = bytes(b ^ i for b in key)
-                    val = symmetric.rc4_encrypt(new_key, val)
-                userpass = val
+                userpass = _rc4_cascade(key, self.odata, range(19, -1, -1))
             owner_password, key = self._auth_user_password_legacy(id1, userpass)
             if owner_password:
                 return AuthResult.OWNER, key
         return AuthResult.FAILED, None
 
-    def authenticate(self, credential, id1: bytes = None):
+    def authenticate(self, credential, id1: bytes = None) -> AuthResult:
         rev = self.revision
         if rev == StandardSecuritySettingsRevision.AES256:
-            res, key = self._authenticate_r6(credential)
+            pw_bytes = _r6_normalise_pw(credential)
         else:
             if id1 is None:
                 raise ValueError(
                     "id1 must be specified for legacy encryption"
                 )  # pragma: nocover
-            credential = _legacy_normalise_pw(credential)
-            res, key = self._authenticate_legacy(id1, credential)
+            pw_bytes = _legacy_normalise_pw(credential)
+        # Callers regularly probe with the empty password, sometimes more
+        # than once, so we remember the outcome of that particular attempt
+        # instead of running the key derivation again. Since anyone can try
+        # the empty password, this doesn't keep any secrets around that
+        # the document doesn't already give away.
+        empty_pw = not pw_bytes
+        memo = self._empty_pw_auth
+        if empty_pw and memo is not None and memo[0] == id1:
+            _, res, key = memo
+        else:
+            if rev == StandardSecuritySettingsRevision.AES256:
+                res, key = self._authenticate_r6(pw_bytes)
+            else:
+                res, key = self._authenticate_legacy(id1, pw_bytes)
+            if empty_pw:
+                self._empty_pw_auth = id1, res, key
         if key is not None:
             self._shared_key = key
+            self._auth_failed = False
         else:
             self._auth_failed = True
         return res
 
     # Algorithm 2.A in ISO 32000-2 § 7.6.4.3.3
-    def _authenticate_r6(self, password) -> Tuple[AuthResult, Optional[bytes]]:
-        pw_bytes = _r6_normalise_pw(password)
-        o_entry_split = _R6KeyEntry.from_bytes(self.odata)
-        u_entry_split = _R6KeyEntry.from_bytes(self.udata)
+    def _authenticate_r6(self, pw_bytes: bytes) \
+            -> Tuple[AuthResult, Optional[bytes]]:
+        o_entry_split = self._o_entry_split
+        u_entry_split = self._u_entry_split
 
         if _r6_password_authenticate(pw_bytes, o_entry_split, self.udata):
             result = AuthResult.OWNER
@@ -1626,22 +1777,16 @@ class StandardSecurityHandler(SecurityHandler):
 
         # check the file key against the perms entry
 
-        # Standard says ECB (which oscrypto doesn't support),
-        # but one round of CBC with IV = 0 is equivalent to ECB
-        decrypted_p_entry = symmetric.aes_cbc_no_padding_decrypt(
-            key, self.encrypted_perms, bytes(16)
+        decrypted_p_entry = _symmetric.aes_ecb_decrypt_block(
+            key, self.encrypted_perms
         )
 
-        # known plaintext mandated in the standard ...sigh...
-        perms_ok = decrypted_p_entry[9:12] == b'adb'
-        perms_ok &= self.perms == struct.unpack('<i', decrypted_p_entry[:4])[0]
-        try:
-            # check encrypt_metadata flag
-            decr_metadata_flag = _EXPECTED_PERMS_8[decrypted_p_entry[8]]
-            perms_ok &= decr_metadata_flag == self.encrypt_metadata
-        except KeyError:
-            perms_ok = False
-
+        # bytes 4-7 are unused, the rest is checked in one constant-time
+        # comparison
+        perms_ok = hmac.compare_digest(
+            decrypted_p_entry[:4] + decrypted_p_entry[8:12],
+            self._expected_perms
+        )
         if not perms_ok:
             raise misc.PdfError(
                 "File decryption key didn't decrypt permission flags "
@@ -1667,16 +1812,30 @@ class PubKeyAdbeSubFilter(enum.Enum):
 
 
 def construct_envelope_content(seed: bytes, perms: int,
-                               include_permissions=True):
+                               include_permissions=True) -> bytes:
     assert len(seed) == 20
-    return seed + (struct.pack('<i', perms) if include_permissions else b'')
+    if include_permissions:
+        return seed + perms.to_bytes(4, 'little', signed=True)
+    return seed
+
+
+# rsaEncryption
+_RSA_ENCRYPTION_OID = '1.2.840.113549.1.1.1'
 
+# This never changes, and is never modified after construction, so all
+# RecipientInfo objects we create can share it
+_PKCS1V15_ALGO = cms.KeyEncryptionAlgorithm({
+    'algorithm': cms.KeyEncryptionAlgorithmId('rsaes_pkcs1v15')
+})
 
-def _recipient_info(envelope_key: bytes, cert: x509.Certificate):
+
+def _recipient_info(envelope_key: bytes, cert: x509.Certificate) \
+        -> cms.RecipientInfo:
     pubkey = cert.public_key
     pubkey_algo_info: PublicKeyAlgorithm = pubkey['algorithm']
-    algorithm_name = pubkey_algo_info['algorithm'].native
-    if algorithm_name != 'rsa':
+    # check the OID directly, and only look up the name for the error message
+    if pubkey_algo_info['algorithm'].dotted != _RSA_ENCRYPTION_OID:
+        algorithm_name = pubkey_algo_info['algorithm'].native
         raise NotImplementedError(
             f"Certificate public key must be of type 'rsa', "
             f"not '{algorithm_name}'."
@@ -1686,8 +1845,8 @@ def _recipient_info(envelope_key: bytes, cert: x509.Certificate):
 
     # TODO having support for oeap here would be cool, but as with PSS
     #  oscrypto only supports the default parameters.
-    encrypted_data = asymmetric.rsa_pkcs1v15_encrypt(
-        asymmetric.load_public_key(pubkey), envelope_key
+    encrypted_data = _asymmetric.rsa_pkcs1v15_encrypt(
+        _asymmetric.load_rsa_public_key(pubkey), envelope_key
     )
     # TODO support subjectKeyIdentifier here (requiring version 2)
     rid = cms.RecipientIdentifier({
@@ -1695,12 +1854,10 @@ def _recipient_info(envelope_key: bytes, cert: x509.Certificate):
             'issuer': cert.issuer, 'serial_number': cert.serial_number
         })
     })
-    algo = cms.KeyEncryptionAlgorithm({
-        'algorithm': cms.KeyEncryptionAlgorithmId('rsaes_pkcs1v15')
-    })
     return cms.RecipientInfo({
         'ktri': cms.KeyTransRecipientInfo({
-            'version': 0, 'rid': rid, 'key_encryption_algorithm': algo,
+            'version': 0, 'rid': rid,
+            'key_encryption_algorithm': _PKCS1V15_ALGO,
             'encrypted_key': encrypted_data
         })
     })
@@ -1729,9 +1886,9 @@ def construct_recipient_cms(certificates: List[x509.Certificate], seed: bytes,
         seed, perms, include_permissions=include_permissions
     )
     # 256-bit key used to encrypt the envelope
-    envelope_key = secrets.token_bytes(32)
+    envelope_key = os.urandom(32)
     # encrypt the envelope content with the envelope key
-    iv, encrypted_envelope_content = symmetric.aes_cbc_pkcs7_encrypt(
+    iv, encrypted_envelope_content = _symmetric.aes_cbc_pkcs7_encrypt(
         envelope_key, envelope_content, iv=None
     )
 
@@ -1776,6 +1933,7 @@ class SimpleEnvelopeKeyDecrypter(EnvelopeKeyDecrypter):
     def __init__(self, cert: x509.Certificate, private_key: PrivateKeyInfo):
         super().__init__(cert)
         self.private_key = private_key
+        self._loaded_key = None
 
     @staticmethod
     def load(key_file, cert_file, key_passphrase=None):
@@ -1806,11 +1964,13 @@ class SimpleEnvelopeKeyDecrypter(EnvelopeKeyDecrypter):
             logger.error(f'Could not open PKCS#12 file {pfx_file}.', e)
             return None
 
-        (kinfo, cert, other_certs) = oskeys.parse_pkcs12(pfx_bytes, passphrase)
-
-        return SimpleEnvelopeKeyDecrypter(
-            cert=cert, private_key=asymmetric.load_private_key(kinfo)
+        private_key, cert, loaded_key = _asymmetric.load_pkcs12(
+            pfx_bytes, passphrase
         )
+        result = SimpleEnvelopeKeyDecrypter(cert=cert, private_key=private_key)
+        # no need to convert the private key again later
+        result._loaded_key = loaded_key
+        return result
 
     def decrypt(self, encrypted_key: bytes,
                 algo_params: cms.KeyEncryptionAlgorithm) -> bytes:
@@ -1820,13 +1980,58 @@ class SimpleEnvelopeKeyDecrypter(EnvelopeKeyDecrypter):
                 f"Only 'rsaes_pkcs1v15' is supported for envelope encryption, "
                 f"not '{algo_name}'."
             )
-        return asymmetric.rsa_pkcs1v15_decrypt(
-            self.private_key, encrypted_key
-        )
+        # convert the private key once, and reuse it on subsequent calls
+        loaded_key = self._loaded_key
+        if loaded_key is None:
+            loaded_key = self._loaded_key = _asymmetric.load_rsa_private_key(
+                self.private_key
+            )
+        return _asymmetric.rsa_pkcs1v15_decrypt(loaded_key, encrypted_key)
+
+
+@lru_cache(maxsize=256)
+def _load_recipient_cms(data: bytes) -> cms.ContentInfo:
+    # Documents encrypted for the same set of recipients (or the same
+    # document being opened repeatedly) contain identical recipient CMS
+    # objects, so there's no need to parse these more than once.
+    # The parsed objects are never modified, so sharing them is safe.
+    return cms.ContentInfo.load(bytes(data))
+
+
+def _recipient_ids(recipient_cms: cms.ContentInfo) \
+        -> Optional[List[Tuple[str, int]]]:
+    # Collect the (issuer, serial number) pairs identifying the recipients
+    # of a CMS object, or return None if the object isn't of the form
+    # expected by read_seed_from_recipient_cms.
+    if recipient_cms['content_type'].native != 'enveloped_data':
+        return None
+    result = []
+    for rec_info in recipient_cms['content']['recipient_infos']:
+        ktri = rec_info.chosen
+        if not isinstance(ktri, cms.KeyTransRecipientInfo):
+            return None
+        issuer_and_serial = ktri['rid'].chosen
+        if not isinstance(issuer_and_serial, cms.IssuerAndSerialNumber):
+            return None
+        result.append((
+            issuer_and_serial['issuer'].hashable,
+            issuer_and_serial['serial_number'].native
+        ))
+    return result
+
+
+# Decryption functions for the envelope ciphers that require an IV
+_ENVELOPE_DECRYPT_WITH_IV = {
+    'aes': _symmetric.aes_cbc_pkcs7_decrypt,
+    'des': symmetric.des_cbc_pkcs5_decrypt,
+    'tripledes': symmetric.tripledes_cbc_pkcs5_decrypt,
+    'rc2': symmetric.rc2_cbc_pkcs5_decrypt
+}
 
 
 def read_seed_from_recipient_cms(recipient_cms: cms.ContentInfo,
-                                 decrypter: EnvelopeKeyDecrypter):
+                                 decrypter: EnvelopeKeyDecrypter) \
+        -> Optional[bytes]:
     content_type = recipient_cms['content_type'].native
     if content_type != 'enveloped_data':
         raise misc.PdfReadError(
@@ -1835,6 +2040,10 @@ def read_seed_from_recipient_cms(recipient_cms: cms.ContentInfo,
         )  # pragma: nocover
     ed: cms.EnvelopedData = recipient_cms['content']
     encrypted_content_info = ed['encrypted_content_info']
+    cert = decrypter.cert
+    target_serial = cert.serial_number
+    target_issuer_der = cert.issuer.dump()
+    target_issuer = None
     rec_info: cms.RecipientInfo
     for rec_info in ed['recipient_infos']:
         ktri = rec_info.chosen
@@ -1847,10 +2056,21 @@ def read_seed_from_recipient_cms(recipient_cms: cms.ContentInfo,
             raise NotImplementedError(
                 "Recipient identifier must be of type IssuerAndSerialNumber."
             )
+        # Check the serial number first: it's cheap to decode, and will
+        # rule out almost all non-matching recipients, so we don't need to
+        # parse and normalise their issuer names at all.
+        if issuer_and_serial['serial_number'].native != target_serial:
+            continue
         issuer = issuer_and_serial['issuer']
-        serial = issuer_and_serial['serial_number'].native
-        if decrypter.cert.issuer == issuer and \
-                decrypter.cert.serial_number == serial:
+        # The issuer is usually copied verbatim from the recipient's
+        # certificate, so try comparing the encoded names first, and
+        # only fall back to comparing normalised names if that fails.
+        issuer_matches = issuer.dump() == target_issuer_der
+        if not issuer_matches:
+            if target_issuer is None:
+                target_issuer = cert.issuer.hashable
+            issuer_matches = issuer.hashable == target_issuer
+        if issuer_matches:
             # we have a match!
             # use the decrypter passed in to decrypt the envelope key
             # for this recipient.
@@ -1874,15 +2094,8 @@ def read_seed_from_recipient_cms(recipient_cms: cms.ContentInfo,
     # des, triple des, rc2 (<=128 bits)
     # and AES-CBC (128, 192, 256 bits)
     cipher_name = algo.encryption_cipher
-    with_iv = {
-        'aes': symmetric.aes_cbc_pkcs7_decrypt,
-        'des': symmetric.des_cbc_pkcs5_decrypt,
-        'tripledes': symmetric.tripledes_cbc_pkcs5_decrypt,
-        'rc2': symmetric.rc2_cbc_pkcs5_decrypt
-    }
-
-    if cipher_name in with_iv:
-        decryption_fun = with_iv[cipher_name]
+    decryption_fun = _ENVELOPE_DECRYPT_WITH_IV.get(cipher_name)
+    if decryption_fun is not None:
         iv = algo.encryption_iv
         content = decryption_fun(envelope_key, encrypted_envelope_content, iv)
     elif cipher_name == 'rc4':
@@ -2032,7 +2245,7 @@ class PubKeySecurityHandler(SecurityHandler):
             cfc = None
         recipients = misc.get_and_apply(
             encrypt_dict, '/Recipients',
-            lambda lst: [cms.ContentInfo.load(x.original_bytes) for x in lst]
+            lambda lst: [_load_recipient_cms(x.original_bytes) for x in lst]
         )
         return PubKeySecurityHandler(
             version=v, pubkey_handler_subfilter=subfilter,
@@ -2105,7 +2318,7 @@ class PubKeySecurityHandler(SecurityHandler):
         if isinstance(recipients, generic.ByteStringObject):
             recipients = recipients,
         recipient_objs = [
-            cms.ContentInfo.load(x.original_bytes) for x in recipients
+            _load_recipient_cms(x.original_bytes) for x in recipients
         ]
         encrypt_metadata = cfdict.get('/EncryptMetadata', True)
         if cfm == '/None':
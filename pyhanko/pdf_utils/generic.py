@@ -719,10 +719,11 @@ class ByteStringObject(bytes, PdfObject):
         bytearr = self
         if handler is not None and container_ref is not None:
             cf = handler.get_string_filter()
-            local_key = cf.derive_object_key(
-                container_ref.idnum, container_ref.generation
-            )
-            bytearr = cf.encrypt(local_key, bytearr)
+            if not cf.is_identity:
+                local_key = cf.derive_object_key(
+                    container_ref.idnum, container_ref.generation
+                )
+                bytearr = cf.encrypt(local_key, bytearr)
         stream.write(b"<")
         stream.write(binascii.hexlify(bytearr))
         stream.write(b">")
@@ -775,10 +776,11 @@ class TextStringObject(str, PdfObject):
             bytearr = codecs.BOM_UTF16_BE + self.encode("utf-16be")
         if handler is not None and container_ref is not None:
             cf = handler.get_string_filter()
-            local_key = cf.derive_object_key(
-                container_ref.idnum, container_ref.generation
-            )
-            bytearr = cf.encrypt(local_key, bytearr)
+            if not cf.is_identity:
+                local_key = cf.derive_object_key(
+                    container_ref.idnum, container_ref.generation
+                )
+                bytearr = cf.encrypt(local_key, bytearr)
             obj = ByteStringObject(bytearr)
             obj.write_to_stream(stream)
         else:
@@ -1260,10 +1262,11 @@ class StreamObject(DictionaryObject):
         if handler is not None and container_ref is not None and \
                 not self._has_crypt_filter:
             cf = handler.get_stream_filter()
-            local_key = cf.derive_object_key(
-                container_ref.idnum, container_ref.generation
-            )
-            data = cf.encrypt(local_key, data)
+            if not cf.is_identity:
+                local_key = cf.derive_object_key(
+                    container_ref.idnum, container_ref.generation
+                )
+                data = cf.encrypt(local_key, data)
         self[NameObject("/Length")] = NumberObject(len(data))
         # write the dictionary
         super().write_to_stream(stream, handler, container_ref)
@@ -1376,10 +1379,15 @@ class DecryptedObjectProxy(PdfObject):
         if isinstance(obj, ByteStringObject) or \
                 isinstance(obj, TextStringObject):
             cf = handler.get_string_filter()
-            local_key = cf.derive_object_key(
-                container_ref.idnum, container_ref.generation
-            )
-            decrypted = pdf_string(cf.decrypt(local_key, obj.original_bytes))
+            if cf.is_identity:
+                decrypted = pdf_string(obj.original_bytes)
+            else:
+                local_key = cf.derive_object_key(
+                    container_ref.idnum, container_ref.generation
+                )
+                decrypted = pdf_string(
+                    cf.decrypt(local_key, obj.original_bytes)
+                )
         elif isinstance(obj, DictionaryObject):
             decrypted_entries = {
                 dictkey: proxy_encrypted_obj(value, handler)
@@ -1397,10 +1405,12 @@ class DecryptedObjectProxy(PdfObject):
                     decrypted_data = obj.encoded_data
                 else:
                     cf = handler.get_string_filter()
-                    local_key = cf.derive_object_key(
-                        container_ref.idnum, container_ref.generation
-                    )
-                    decrypted_data = cf.decrypt(local_key, obj.encoded_data)
+                    decrypted_data = obj.encoded_data
+                    if not cf.is_identity:
+                        local_key = cf.derive_object_key(
+                            container_ref.idnum, container_ref.generation
+                        )
+                        decrypted_data = cf.decrypt(local_key, decrypted_data)
 
                 decrypted = StreamObject(
                     decrypted_entries, encoded_data=decrypted_data,
@@ -10,13 +10,14 @@ This comes at a cost, and future iterations of this module may offer more
 flexibility in terms of the level of detail with which file size is scrutinised.
 """
 
-import struct
 import os
 import re
-from collections import defaultdict
+from bisect import bisect_left
+from collections import defaultdict, OrderedDict
 from io import BytesIO
 from itertools import chain
-from typing import Set, List, Optional, Union, Tuple
+from operator import attrgetter
+from typing import Set, List, Optional, Union, Tuple, Dict, FrozenSet
 
 from . import generic, misc
 from .misc import PdfReadError
@@ -36,6 +37,28 @@ __all__ = ['PdfFileReader', 'HistoricalResolver']
 
 header_regex = re.compile(b'%PDF-(\\d).(\\d)')
 catalog_version_regex = re.compile(r'/(\d).(\d)')
+digit_regex = re.compile(rb'\d')
+# a sequence of xref table rows in the standard 20-byte format
+xref_table_regex = re.compile(rb'(?:\d{10} \d{5} [fn](?: [\r\n]|\r\n))*')
+
+# Object headers, including one optional comment line before them.
+# The groups capture superfluous whitespace, the object ID, more superfluous
+# whitespace and the generation number.
+obj_header_regex = re.compile(
+    rb'(?:%[^\r\n]*[\r\n])?([ \n\r\t\x00]*)(\d+)[ \t\r\n]'
+    rb'([ \n\r\t\x00]*)(\d+)[ \t\r\n]obj[ \n\r\t\x00]*'
+)
+OBJ_HEADER_WINDOW = 64
+
+# lookup tables for byte checks in hot loops (the "chars" variants contain
+# integers, for use with indexed bytes)
+EOL_MARKERS = frozenset((b'\r', b'\n'))
+EOL_CHARS = frozenset(b'\r\n')
+# characters indicating that an xref table row is one byte short
+XREF_BLEED_CHARS = frozenset(b'0123456789t')
+
+# number of object stream headers to keep around in PdfFileReader
+OBJ_STREAM_CACHE_SIZE = 8
 
 # General remark:
 # PyPDF2 parses all files backwards.
@@ -53,13 +76,13 @@ def read_next_end_line(stream):
             if stream.tell() < 2:
                 raise PdfReadError("EOL marker not found")
             stream.seek(-2, os.SEEK_CUR)
-            if x == b'\n' or x == b'\r':
+            if x in EOL_MARKERS:
                 break
             yield ord(x)
         crlf = False
-        while x == b'\n' or x == b'\r':
+        while x in EOL_MARKERS:
             x = stream.read(1)
-            if x == b'\n' or x == b'\r':  # account for CR+LF
+            if x in EOL_MARKERS:  # account for CR+LF
                 stream.seek(-1, os.SEEK_CUR)
                 crlf = True
             if stream.tell() < 2:
@@ -84,15 +107,33 @@ class XRefCache:
         self.last_change = {}
         # making this a dict doesn't make much sense
         self.history = defaultdict(list)
+        # section indices of the entries in history, kept separately
+        # to allow for binary search
+        self._history_sections = defaultdict(list)
         self._current_section_ids = set()
         self._current_section_freed = set()
         self._refs_by_section = []
         self._freed_by_section = []
-        self._generations = {}
+        # generations in use for each object ID, and the lowest one of those
+        # (which is all we need to check for conflicts when freeing)
+        self._generations: Dict[int, Set[int]] = {}
+        self._min_generation: Dict[int, int] = {}
         self._previous_expected_free = {}
         self.xref_container_info = []
 
         self._obj_streams_by_revision = defaultdict(set)
+        # the same references tend to show up in many xref sections, so
+        # we share Reference objects (which are immutable) between them
+        self._refs: Dict[Tuple[int, int], generic.Reference] = {}
+
+    def _ref(self, idnum, generation) -> generic.Reference:
+        key = (idnum, generation)
+        try:
+            return self._refs[key]
+        except KeyError:
+            ref = self._refs[key] = \
+                generic.Reference(idnum, generation, self.reader)
+            return ref
 
     def _next_section(self):
         self.xref_sections += 1
@@ -117,21 +158,20 @@ class XRefCache:
         null_ref = generic.Reference(idnum, prev_generation)
         self._current_section_freed.add(null_ref)
         self._current_section_ids.add(null_ref)
-        try:
-            # check for sneaky reuse: does prev_generation (or any lower one)
-            # still occur later in the file?
-            conflicting_gen = next(
-                gen for gen in self._generations[idnum]
-                if gen <= prev_generation
-            )
+        # check for sneaky reuse: does prev_generation (or any lower one)
+        # still occur later in the file?
+        min_gen = self._min_generation.get(idnum)
+        if min_gen is None:
+            self._generations[idnum] = {prev_generation}
+            self._min_generation[idnum] = prev_generation
+        elif min_gen <= prev_generation:
             raise PdfReadError(
-                f"Generation {conflicting_gen} of object {idnum} occurs "
+                f"Generation {min_gen} of object {idnum} occurs "
                 f"after generation {prev_generation} was freed."
             )
-        except KeyError:
-            self._generations[idnum] = {prev_generation}
-        except StopIteration:
+        else:
             self._generations[idnum].add(prev_generation)
+            self._min_generation[idnum] = prev_generation
 
         if idnum not in self.last_change:
             # this revision is the last change
@@ -166,43 +206,51 @@ class XRefCache:
             self.standard_xrefs[(generation, idnum)] = start
             self.last_change[idnum] = self.xref_sections
             self._generations[idnum] = {generation}
+            self._min_generation[idnum] = generation
         else:
             self._generations[idnum].add(generation)
         self.history[(generation, idnum)].append((self.xref_sections, start))
-        self._current_section_ids.add(
-            generic.Reference(idnum, generation, self.reader)
-        )
+        self._history_sections[(generation, idnum)].append(self.xref_sections)
+        self._current_section_ids.add(self._ref(idnum, generation))
 
     def put_obj_stream_ref(self, idnum, obj_stream_num, obj_stream_ix):
         self._obj_streams_by_revision[self.xref_sections].add(
-            generic.Reference(obj_stream_num, 0, self.reader)
+            self._ref(obj_stream_num, 0)
         )
         marker = (obj_stream_num, obj_stream_ix)
         if not self.used_later(idnum, 0):
             self.in_obj_stream[idnum] = marker
             self.last_change[idnum] = self.xref_sections
             self._generations[idnum] = {0}
+            self._min_generation[idnum] = 0
 
         self.history[(0, idnum)].append((self.xref_sections, marker))
-        self._current_section_ids.add(generic.Reference(idnum, 0, self.reader))
+        self._history_sections[(0, idnum)].append(self.xref_sections)
+        self._current_section_ids.add(self._ref(idnum, 0))
 
     @property
     def total_revisions(self):
         return self.xref_sections
 
+    def _flip_index(self, ix):
+        # Xref sections are numbered in processing order (i.e. the most
+        # recent one first), revisions the other way around.
+        # This translates between the two, in either direction.
+        return self.xref_sections - 1 - ix
+
     def get_last_change(self, idnum):
-        return self.xref_sections - 1 - self.last_change[idnum]
+        return self._flip_index(self.last_change[idnum])
 
     def object_streams_used_in(self, revision):
-        return self._obj_streams_by_revision[self.xref_sections - 1 - revision]
+        return self._obj_streams_by_revision[self._flip_index(revision)]
 
     def get_introducing_revision(self, ref: generic.Reference):
         ref_hist = self.history[(ref.generation, ref.idnum)]
         section, _ = ref_hist[len(ref_hist) - 1]
-        return self.xref_sections - 1 - section
+        return self._flip_index(section)
 
     def get_xref_container_info(self, revision):
-        return self.xref_container_info[self.xref_sections - 1 - revision]
+        return self.xref_container_info[self._flip_index(revision)]
 
     def explicit_refs_in_revision(self, revision) -> Set[generic.Reference]:
         """
@@ -215,7 +263,7 @@ class XRefCache:
             A set of Reference objects.
         """
         rbs = self._refs_by_section
-        return rbs[self.xref_sections - 1 - revision]
+        return rbs[self._flip_index(revision)]
 
     def refs_freed_in_revision(self, revision) -> Set[generic.Reference]:
         """
@@ -228,7 +276,7 @@ class XRefCache:
             A set of Reference objects.
         """
         fbs = self._freed_by_section
-        return fbs[self.xref_sections - 1 - revision]
+        return fbs[self._flip_index(revision)]
 
     def get_startxref_for_revision(self, revision):
         """
@@ -240,7 +288,7 @@ class XRefCache:
         :return:
             An integer pointer
         """
-        return self.xref_locations[self.xref_sections - 1 - revision]
+        return self.xref_locations[self._flip_index(revision)]
 
     def get_historical_ref(self, ref, revision):
         """
@@ -254,31 +302,53 @@ class XRefCache:
             An integer offset, or a pair of integers indicating an object
             in an object stream.
         """
-        max_index = self.xref_sections - 1
         ix = (ref.generation, ref.idnum)
 
         # Remember: in the history record, revisions are numbered backwards.
         # (i.e. the first item is the most recent, and the last one is
         # the oldest)
         # Hence, the first match that corresponds to a point in time at or
-        # before 'revision' is the one we want
-        for rev_index, marker in self.history[ix]:
-            if revision >= max_index - rev_index:
-                return marker
+        # before 'revision' is the one we want. Since section indices
+        # only go up as we move through the history, we can bisect.
+        sections = self._history_sections.get(ix, ())
+        pos = bisect_left(sections, self._flip_index(revision))
+        if pos < len(sections):
+            return self.history[ix][pos][1]
         raise PdfReadError(
             f'Could not find object ({ref.idnum} {ref.generation}) '
             f'in history at revision {revision}'
         )
 
     def __getitem__(self, ref):
-        if ref.generation == 0 and \
-                ref.idnum in self.in_obj_stream:
-            return self.in_obj_stream[ref.idnum]
-        else:
-            try:
-                return self.standard_xrefs[(ref.generation, ref.idnum)]
-            except KeyError:
-                raise PdfReadError("Could not find object.")
+        generation = ref.generation
+        if generation == 0:
+            marker = self.in_obj_stream.get(ref.idnum)
+            if marker is not None:
+                return marker
+        # freed objects are recorded as NullObject, so None means 'missing'
+        marker = self.standard_xrefs.get((generation, ref.idnum))
+        if marker is None:
+            raise PdfReadError("Could not find object.")
+        return marker
+
+    def _read_xref_subsection(self, stream, num, size) -> bool:
+        # Fast path for well-formed xref table subsections: read the entire
+        # subsection in one go, and slice the fields out of each row.
+        # If the data doesn't pass muster, rewind and return False, so
+        # the caller can deal with it line by line.
+        start = stream.tell()
+        block = stream.read(20 * size)
+        if len(block) != 20 * size or not xref_table_regex.fullmatch(block):
+            stream.seek(start)
+            return False
+        for ix in range(0, len(block), 20):
+            generation = int(block[ix + 11:ix + 16])
+            if block[ix + 17] == 0x6e:  # 'n'
+                self.put_ref(num, generation, int(block[ix:ix + 10]))
+            else:
+                self.free_ref(num, generation)
+            num += 1
+        return True
 
     def read_xref_table(self):
         stream = self.reader.stream
@@ -291,6 +361,9 @@ class XRefCache:
             size = generic.NumberObject.read_from_stream(stream)
             misc.read_non_whitespace(stream)
             stream.seek(-1, os.SEEK_CUR)
+            if self._read_xref_subsection(stream, num, size):
+                num += size
+                size = 0
             for cnt in range(0, size):
                 line = stream.read(20)
 
@@ -300,7 +373,7 @@ class XRefCache:
                 # 21-byte entries (or more) due to the use of \r\n
                 # (CRLF) EOL's. Detect that case, and adjust the line
                 # until it does not begin with a \r (CR) or \n (LF).
-                while line[0] in b"\x0D\x0A":
+                while line[0] in EOL_CHARS:
                     stream.seek(-20 + 1, os.SEEK_CUR)
                     line = stream.read(20)
 
@@ -310,10 +383,16 @@ class XRefCache:
                 # back one character.  (0-9 means we've bled into
                 # the next xref entry, t means we've bled into the
                 # text "trailer"):
-                if line[-1] in b"0123456789t":
+                if line[-1] in XREF_BLEED_CHARS:
                     stream.seek(-1, os.SEEK_CUR)
 
-                offset, generation, marker = line[:18].split(b" ")
+                if line[10] == 0x20 and line[16] == 0x20:  # ' '
+                    # the fields are in their standard positions
+                    offset = line[0:10]
+                    generation = line[11:16]
+                    marker = line[17:18]
+                else:
+                    offset, generation, marker = line[:18].split(b" ")
                 if marker == b'n':
                     self.put_ref(num, int(generation), int(offset))
                 elif marker == b'f':
@@ -333,7 +412,8 @@ class XRefCache:
         self._next_section()
 
     def read_xref_stream(self, xrefstream):
-        stream_data = BytesIO(xrefstream.data)
+        data = xrefstream.data
+        stream_data = BytesIO(data)
         # Index pairs specify the subsections in the dictionary. If
         # none create one subsection that spans everything.
         idx_pairs = xrefstream.get("/Index", [0, xrefstream.get("/Size")])
@@ -353,41 +433,92 @@ class XRefCache:
             else:
                 return 0
 
+        def read_entries(count):
+            for _ in range(count):
+                yield get_entry(0), get_entry(1), get_entry(2)
+
+        if len(idx_pairs) % 2:
+            raise PdfReadError(
+                "/Index array in xref stream has odd number of elements"
+            )
+        subsections = [
+            (idx_pairs[i], idx_pairs[i + 1])
+            for i in range(0, len(idx_pairs), 2)
+        ]
+        entry_len = sum(entry_sizes)
+        # In the usual case, we can slice the entries out of the data
+        # directly, without going through get_entry for every field.
+        fast = len(entry_sizes) == 3 and \
+            len(data) >= entry_len * sum(size for _, size in subsections)
+
         # Iterate through each subsection
         last_end = 0
-        for start, size in misc.pair_iter(idx_pairs):
+        offset = 0
+        for start, size in subsections:
             # The subsections must increase
             assert start >= last_end
             last_end = start + size
-            for num in range(start, start + size):
-                # The first entry is the type
-                xref_type = get_entry(0)
+            if fast:
+                entries = _read_xref_stream_entries(
+                    data, offset, size, entry_sizes
+                )
+                offset += size * entry_len
+            else:
+                entries = read_entries(size)
+            for num, (xref_type, field1, field2) in \
+                    zip(range(start, start + size), entries):
                 # The rest of the elements depend on the xref_type
                 if xref_type == 1:
                     # objects that are in use but are not compressed
-                    byte_offset = get_entry(1)
-                    generation = get_entry(2)
-                    self.put_ref(num, generation, byte_offset)
+                    # (field1 = byte offset, field2 = generation)
+                    self.put_ref(num, field2, field1)
                 elif xref_type == 2:
                     # compressed objects
-                    objstr_num = get_entry(1)
-                    objstr_idx = get_entry(2)
-                    self.put_obj_stream_ref(num, objstr_num, objstr_idx)
+                    # (field1 = object stream number, field2 = index)
+                    self.put_obj_stream_ref(num, field1, field2)
                 elif xref_type == 0:
                     # freed object
-                    # we ignore the linked list aspect anyway, so discard first
-                    get_entry(1)
-                    next_generation = get_entry(2)
-                    self.free_ref(num, next_generation)
-                else:
-                    # unknown type (=> ignore).
-                    get_entry(1)
-                    get_entry(2)
+                    # we ignore the linked list aspect anyway, so discard
+                    # field1 (next free object) and only keep the generation
+                    self.free_ref(num, field2)
+                # unknown type (=> ignore).
 
         self._next_section()
 
 
+def _read_xref_stream_entries(data, offset, count, entry_sizes):
+    w0, w1, w2 = entry_sizes
+    end1 = w0 + w1
+    entry_len = end1 + w2
+    from_bytes = int.from_bytes
+    for pos in range(offset, offset + count * entry_len, entry_len):
+        # an empty slice (i.e. a width of zero) yields the default value
+        # of 0 for the second and third fields, but the type defaults to 1
+        yield (
+            from_bytes(data[pos:pos + w0], 'big') if w0 else 1,
+            from_bytes(data[pos + w0:pos + end1], 'big'),
+            from_bytes(data[pos + end1:pos + entry_len], 'big')
+        )
+
+
 def read_object_header(stream, strict):
+    # Fast path: match the whole header in one go. If that doesn't work out
+    # (e.g. due to weird formatting or because we hit the end of our window),
+    # we fall back to reading the header piece by piece.
+    start = stream.tell()
+    window = stream.read(OBJ_HEADER_WINDOW)
+    m = obj_header_regex.match(window)
+    if m is not None and m.end() < len(window):
+        stream.seek(start + m.end())
+        idnum, generation = m.group(2), m.group(4)
+        if strict and (m.group(1) or m.group(3)):
+            logger.warning(
+                f"Superfluous whitespace found in object header "
+                f"{idnum} {generation}"
+            )
+        return int(idnum), int(generation)
+    stream.seek(start)
+
     # Should never be necessary to read out whitespace, since the
     # cross-reference table should put us in the right spot to read the
     # object header.  In reality... some files have stupid cross reference
@@ -411,6 +542,56 @@ def read_object_header(stream, strict):
     return int(idnum), int(generation)
 
 
+def _tail_bytes(stream, n=1024):
+    # read (at most) n bytes up to and including the current position
+    end = stream.tell() + 1
+    start = max(0, end - n)
+    stream.seek(start)
+    return stream.read(end - start), start
+
+
+def _last_line_start(buf, end):
+    # Find the start of the last line in buf[:end], skipping over trailing
+    # EOL markers. Returns -1 if the line extends past the start of the buffer
+    end = len(buf[:end].rstrip(b'\r\n'))
+    start = max(buf.rfind(b'\n', 0, end), buf.rfind(b'\r', 0, end))
+    if start == -1:
+        return -1, end
+    return start + 1, end
+
+
+def _find_startxref(buf) -> Optional[int]:
+    # Fast path for process_data_at_eof, operating on a single chunk of data.
+    # Returns None if the result can't be determined from the data
+    # in the buffer alone (including when the file is malformed, so that
+    # the slow path can produce the appropriate error).
+    eof_pos = buf.rfind(b'%%EOF')
+    while eof_pos > 0 and buf[eof_pos - 1] not in EOL_CHARS:
+        eof_pos = buf.rfind(b'%%EOF', 0, eof_pos)
+    if eof_pos <= 0:
+        return None
+    line_start, line_end = _last_line_start(buf, eof_pos)
+    if line_start < 0:
+        return None
+    line = buf[line_start:line_end]
+    try:
+        startxref = int(line)
+    except ValueError:
+        # 'startxref' may be on the same line as the location
+        if not line.startswith(b"startxref"):
+            return None
+        try:
+            startxref = int(line[9:].strip())
+        except ValueError:
+            return None
+        logger.warning("startxref on same line as offset")
+        return startxref
+    kw_start, _ = _last_line_start(buf, line_start)
+    if kw_start < 0 or buf[kw_start:kw_start + 9] != b"startxref":
+        return None
+    return startxref
+
+
 def process_data_at_eof(stream) -> int:
     """
     Auxiliary function that reads backwards from the current position
@@ -422,6 +603,15 @@ def process_data_at_eof(stream) -> int:
         Otherwise a PdfReadError is raised.
     """
 
+    pos = stream.tell()
+    buf, _ = _tail_bytes(stream)
+    startxref = _find_startxref(buf)
+    if startxref is not None:
+        return startxref
+
+    # fall back to reading line by line (which is also responsible for
+    # producing appropriate errors)
+    stream.seek(pos)
     # offset of last 1024 bytes of stream
     last_1k = stream.tell() - 1024 + 1
     line = b''
@@ -461,9 +651,17 @@ class TrailerDictionary(generic.PdfObject):
         # The element at index 0 is the most recent one.
         self._trailer_revisions: List[generic.DictionaryObject] = []
         self._new_changes = generic.DictionaryObject()
+        # caches for flatten() and keys(), invalidated on every change
+        self._flat_cache: Dict[Optional[int], generic.DictionaryObject] = {}
+        self._keys_cache: Optional[FrozenSet] = None
+
+    def _invalidate(self):
+        self._flat_cache = {}
+        self._keys_cache = None
 
     def add_trailer_revision(self, trailer_dict: generic.DictionaryObject):
         self._trailer_revisions.append(trailer_dict)
+        self._invalidate()
 
     def __getitem__(self, item):
         # the decrypt parameter doesn't matter, get_object() decrypts
@@ -491,11 +689,13 @@ class TrailerDictionary(generic.PdfObject):
 
     def __setitem__(self, item, value):
         self._new_changes[item] = value
+        self._invalidate()
 
     def __delitem__(self, item):
         try:
             # deleting stuff from _new_changes should be OK.
             del self._new_changes[item]
+            self._invalidate()
         except KeyError:
             raise misc.PdfError(
                 "Cannot remove existing entries from trailer dictionary, only "
@@ -503,6 +703,11 @@ class TrailerDictionary(generic.PdfObject):
             )
 
     def flatten(self, revision=None) -> generic.DictionaryObject:
+        try:
+            # return a copy, since callers may modify the result
+            return generic.DictionaryObject(self._flat_cache[revision])
+        except KeyError:
+            pass
         relevant_revisions = self._trailer_revisions
         if revision is not None:
             relevant_revisions = relevant_revisions[-revision-1:]
@@ -521,15 +726,19 @@ class TrailerDictionary(generic.PdfObject):
         trailer.pop('/W', None)
         trailer.pop('/Type', None)
         trailer.pop('/Index', None)
-        return trailer
+        self._flat_cache[revision] = trailer
+        return generic.DictionaryObject(trailer)
 
     def __contains__(self, item):
-        if item in self._new_changes:
-            return True
-        return any(item in revision for revision in self._trailer_revisions)
+        return item in self.keys()
 
     def keys(self):
-        return frozenset(chain(self._new_changes, *self._trailer_revisions))
+        keys = self._keys_cache
+        if keys is None:
+            keys = self._keys_cache = frozenset(
+                chain(self._new_changes, *self._trailer_revisions)
+            )
+        return keys
 
     def __iter__(self):
         return iter(self.keys())
@@ -562,9 +771,18 @@ class PdfFileReader(PdfHandler):
         self.security_handler: Optional[SecurityHandler] = None
         self.strict = strict
         self.resolved_objects = {}
+        self._batched_obj_streams = set()
+        self._obj_stream_headers = OrderedDict()
         self.input_version = None
         self.xrefs = XRefCache(self)
         self._historical_resolver_cache = {}
+        # page tree nodes by /Pages reference, together with the revision
+        # they were computed for and the objects the result depends on
+        self._page_tree_cache: Dict[
+            generic.Reference,
+            Tuple[int, FrozenSet[generic.Reference],
+                  FrozenSet[generic.Reference]]
+        ] = {}
         self.stream = stream
         self.read()
         # override version if necessary
@@ -591,7 +809,13 @@ class PdfFileReader(PdfHandler):
 
         self._embedded_signatures = None
 
-    def _get_object_from_stream(self, idnum, stmnum, idx):
+    def _get_obj_stream_header(self, stmnum):
+        try:
+            result = self._obj_stream_headers[stmnum]
+            self._obj_stream_headers.move_to_end(stmnum)
+            return result
+        except KeyError:
+            pass
         # indirect reference to object in object stream
         # read the entire object stream into memory
         stream_ref = generic.Reference(stmnum, 0, self)
@@ -599,46 +823,90 @@ class PdfFileReader(PdfHandler):
         assert isinstance(stream, generic.StreamObject)
         # This is an xref to a stream, so its type better be a stream
         assert stream['/Type'] == '/ObjStm'
-        # /N is the number of indirect objects in the stream
-        assert idx < stream['/N']
+        # This buffer is kept around together with the parsed header, and
+        # reused for all reads from this object stream.
+        # Note: BytesIO doesn't copy its initial value if it's a bytes object,
+        # as long as it's not written to.
         stream_data = BytesIO(stream.data)
-        first_object = stream['/First']
-        for i in range(stream['/N']):
+        # read the (object number, offset) pairs in the header
+        header = []
+        for _ in range(stream['/N']):
             misc.read_non_whitespace(stream_data, seek_back=True)
             objnum = generic.NumberObject.read_from_stream(stream_data)
             misc.read_non_whitespace(stream_data, seek_back=True)
             offset = generic.NumberObject.read_from_stream(stream_data)
             misc.read_non_whitespace(stream_data, seek_back=True)
-            if objnum != idnum:
-                # We're only interested in one object
-                continue
-            if self.strict and idx != i:
-                raise PdfReadError("Object is in wrong index.")
-            obj_start = first_object + offset
-            stream_data.seek(obj_start)
-            try:
-                obj = generic.read_object(
-                    stream_data, generic.Reference(idnum, 0, self),
-                )
-            except misc.PdfStreamError as e:
-                # Stream object cannot be read. Normally, a critical error, but
-                # Adobe Reader doesn't complain, so continue (in strict mode?)
-                logger.warning(
-                    f"Invalid stream (index {i}) within object {idnum} 0: {e}"
-                )
+            header.append((objnum, offset))
+        # map object numbers to their position in the stream
+        # (if an object number occurs more than once, the first one wins)
+        index = {}
+        for i, (objnum, offset) in enumerate(header):
+            index.setdefault(objnum, (i, offset))
+        result = stream['/First'], stream_data, header, index
+        self._obj_stream_headers[stmnum] = result
+        if len(self._obj_stream_headers) > OBJ_STREAM_CACHE_SIZE:
+            self._obj_stream_headers.popitem(last=False)
+        return result
+
+    def _get_object_from_stream(self, idnum, stmnum, idx):
+        first_object, stream_data, header, index = \
+            self._get_obj_stream_header(stmnum)
+        # /N is the number of indirect objects in the stream
+        assert idx < len(header)
+        try:
+            i, offset = index[idnum]
+        except KeyError:
+            if self.strict:
+                raise PdfReadError("This is a fatal error in strict mode.")
+            return generic.NullObject()
+        if self.strict and idx != i:
+            raise PdfReadError("Object is in wrong index.")
 
-                if self.strict:
-                    raise PdfReadError("Can't read object stream: %s" % e)
-                # Replace with null. Hopefully it's nothing important.
-                obj = generic.NullObject()
-            generic.read_non_whitespace(
-                stream_data, seek_back=True, allow_eof=True
+        stream_data.seek(first_object + offset)
+        try:
+            obj = generic.read_object(
+                stream_data, generic.Reference(idnum, 0, self),
             )
-            return obj
+        except misc.PdfStreamError as e:
+            # Stream object cannot be read. Normally, a critical
+            # error, but Adobe Reader doesn't complain, so continue
+            # (in strict mode?)
+            logger.warning(
+                f"Invalid stream (index {i}) within object "
+                f"{idnum} 0: {e}"
+            )
+
+            if self.strict:
+                raise PdfReadError("Can't read object stream: %s" % e)
+            # Replace with null. Hopefully it's nothing important.
+            obj = generic.NullObject()
 
-        if self.strict:
-            raise PdfReadError("This is a fatal error in strict mode.")
-        return generic.NullObject()
+        # Object streams typically contain lots of objects that are
+        # accessed together, so we parse & cache all of them on the first
+        # pass, instead of re-reading the header for each of them.
+        if stmnum in self._batched_obj_streams:
+            return obj
+        self._batched_obj_streams.add(stmnum)
+        in_obj_stream = self.xrefs.in_obj_stream
+        for j, (objnum, offset) in enumerate(header):
+            # Only cache objects for which this stream is authoritative
+            # according to the xref data, i.e. that haven't been
+            # overridden in a later revision.
+            if objnum == idnum or in_obj_stream.get(objnum) != (stmnum, j) \
+                    or self.cache_get_indirect_object(0, objnum) is not None:
+                continue
+            # Errors are ignored here (whatever their type, since parse
+            # errors don't always manifest as PdfReadErrors); they'll surface
+            # when (if) someone asks for the object in question.
+            stream_data.seek(first_object + offset)
+            try:
+                other = generic.read_object(
+                    stream_data, generic.Reference(objnum, 0, self),
+                )
+            except Exception:
+                continue
+            self.cache_indirect_object(0, objnum, other)
+        return obj
 
     def _get_encryption_params(self) -> Optional[generic.DictionaryObject]:
         try:
@@ -825,27 +1093,35 @@ class PdfFileReader(PdfHandler):
         self.trailer.container_ref = generic.TrailerReference(self)
         startxref = self.last_startxref
         xref_location_log = self.xrefs.xref_locations
+        # guard against /Prev chains that loop back on themselves
+        seen = set()
         while startxref is not None:
+            if startxref in seen:
+                raise PdfReadError(
+                    f"Cycle in xref /Prev chain at offset {startxref}"
+                )
+            seen.add(startxref)
             xref_location_log.append(startxref)
             # load the xref table
             stream.seek(startxref)
-            x = stream.read(1)
-            if x == b"x":
+            # peek at the first few bytes to decide what kind of xref
+            # section we're dealing with
+            peek = stream.read(5)
+            if peek[:1] == b"x":
                 # standard cross-reference table
-                ref = stream.read(4)
-                if ref[:3] != b"ref":
+                if peek[1:4] != b"ref":
                     raise PdfReadError("xref table read error")
                 startxref = self._read_xref_table()
-            elif x.isdigit():
+            elif peek[:1].isdigit():
                 # PDF 1.5+ Cross-Reference Stream
-                stream.seek(-1, os.SEEK_CUR)
+                stream.seek(startxref)
                 startxref = self._read_xref_stream()
                 self.has_xref_stream = True
             else:
                 # bad xref character at startxref.  Let's see if we can find
                 # the xref table nearby, as we've observed this error with an
                 # off-by-one before.
-                stream.seek(-11, os.SEEK_CUR)
+                stream.seek(max(startxref - 10, 0))
                 tmp = stream.read(20)
                 xref_loc = tmp.find(b"xref")
                 if xref_loc != -1:
@@ -853,14 +1129,10 @@ class PdfFileReader(PdfHandler):
                     continue
                 # No explicit xref table, try finding a cross-reference stream.
                 stream.seek(startxref)
-                found = False
-                for look in range(5):
-                    if stream.read(1).isdigit():
-                        # This is not a standard PDF, consider adding a warning
-                        startxref += look
-                        found = True
-                        break
-                if found:
+                m = digit_regex.search(stream.read(5))
+                if m is not None:
+                    # This is not a standard PDF, consider adding a warning
+                    startxref += m.start()
                     continue
                 # no xref table found at specified location
                 raise PdfReadError(
@@ -1009,22 +1281,22 @@ class PdfFileReader(PdfHandler):
         from pyhanko.sign.validation import EmbeddedPdfSignature
         sig_fields = enumerate_sig_fields(self, filled_status=True)
 
-        result = sorted(
-            (
-                EmbeddedPdfSignature(self, sig_field)
-                for _, sig_obj, sig_field in sig_fields
-            ), key=lambda emb: emb.signed_revision
-        )
+        result = [
+            EmbeddedPdfSignature(self, sig_field)
+            for _, sig_obj, sig_field in sig_fields
+        ]
+        result.sort(key=attrgetter('signed_revision'))
         self._embedded_signatures = result
         return result
 
 
 def convert_to_int(d, size):
-    if size <= 8:
-        padding = bytes(8 - size)
-        return struct.unpack(">q", padding + d)[0]
-    else:
-        return sum(digit ** (size - ix - 1) for ix, digit in enumerate(d))
+    # big-endian, unsigned
+    if len(d) != size:
+        raise PdfReadError(
+            f"Expected {size} bytes for integer field, got {len(d)}."
+        )
+    return int.from_bytes(d, 'big')
 
 
 class RawPdfPath:
@@ -1032,8 +1304,14 @@ class RawPdfPath:
     Class to model raw paths in a file.
     """
 
+    # there can be lots of these in the reverse xref cache
+    __slots__ = ('path', '_hash')
+
     def __init__(self, *path: Union[str, int]):
         self.path = path
+        # paths are immutable, and lots of them end up in sets, so we
+        # compute the hash once
+        self._hash = hash(path)
 
     def __len__(self):
         return len(self.path)
@@ -1041,17 +1319,15 @@ class RawPdfPath:
     def __iter__(self):
         return iter(self.path)
 
-    def _tag(self):
-        # should give better hashing results
-        return tuple(map(lambda x: (isinstance(x, int), x), self.path))
-
     def __hash__(self):
-        return hash(self._tag())
+        return self._hash
 
     def __eq__(self, other):
+        # Note: path entries are either names or array indices, and
+        # those never compare equal to each other
         return (
             isinstance(other, RawPdfPath)
-            and (self is other or self._tag() == other._tag())
+            and (self is other or self.path == other.path)
         )
 
     @staticmethod
@@ -1076,6 +1352,16 @@ class RawPdfPath:
         return f"PathInRevision('{str(self)}')"
 
 
+# object types that HistoricalResolver needs to rewrite
+_SUBSUMABLE = (
+    generic.IndirectObject, generic.DictionaryObject, generic.ArrayObject
+)
+
+# dictionary keys that _load_reverse_xref_cache doesn't follow, since the
+# paths through them don't convey any useful information
+_PATH_SKIP_KEYS = frozenset(('/Parent',))
+
+
 class HistoricalResolver(PdfHandler):
     """
     :class:`~.rw_common.PdfHandler` implementation that provides a view
@@ -1097,19 +1383,28 @@ class HistoricalResolver(PdfHandler):
 
     @property
     def document_id(self) -> Tuple[bytes, bytes]:
-        id_arr = self._trailer['/ID']
+        id_arr = self.trailer_view['/ID']
         return id_arr[0].original_bytes, id_arr[1].original_bytes
 
     def __init__(self, reader: PdfFileReader, revision):
         self.cache = {}
         self.reader = reader
         self.revision = revision
-        self._trailer = self.reader.trailer.flatten(self.revision)
+        self._trailer: Optional[generic.DictionaryObject] = None
         self._indirect_object_access_cache = None
+        self._child_refs_cache: Dict[
+            generic.Reference, List[generic.Reference]
+        ] = {}
 
     @property
     def trailer_view(self) -> generic.DictionaryObject:
-        return self._trailer
+        # flattened on first access; plenty of resolvers never look at
+        # the trailer at all
+        trailer = self._trailer
+        if trailer is None:
+            self._trailer = trailer = \
+                self.reader.trailer.flatten(self.revision)
+        return trailer
 
     def get_object(self, ref: generic.Reference):
         cache = self.cache
@@ -1124,34 +1419,80 @@ class HistoricalResolver(PdfHandler):
             revision = self.revision
             if reader.xrefs.get_last_change(ref.idnum) <= revision:
                 obj = reader.get_object(ref)
+                private = False
             else:
+                # historical reads bypass the reader's cache, so nobody
+                # else holds on to this object
                 obj = reader.get_object(ref, revision)
+                private = True
 
             # replace all PDF handler references in the object with references
             # to this one, so that indirect references will resolve within
             # this historical revision
-            cache[ref] = obj = self._subsume_object(obj)
+            cache[ref] = obj = self._subsume_object(obj, private=private)
             return obj
 
-    def _subsume_object(self, obj):
+    def _subsume_object(self, obj, private=False):
+        # The object tree is rebuilt using an explicit stack instead of
+        # recursion: containers are created empty, attached to their parent
+        # right away, and filled in when they're taken off the stack.
+        # If 'private' is set, the caller guarantees that obj isn't
+        # referenced anywhere else (in particular, not in the reader's
+        # object cache), so it can be reused where no rewriting is necessary.
+        result, todo = self._subsume_shallow(obj, private)
+        stack = [todo] if todo is not None else []
+        while stack:
+            new, old = stack.pop()
+            if isinstance(new, generic.ArrayObject):
+                for v in old:
+                    copy, todo = self._subsume_shallow(v, private)
+                    list.append(new, copy)
+                    if todo is not None:
+                        stack.append(todo)
+            else:
+                for k, v in old.items():
+                    copy, todo = self._subsume_shallow(v, private)
+                    dict.__setitem__(new, k, copy)
+                    if todo is not None:
+                        stack.append(todo)
+        return result
+
+    def _subsume_shallow(self, obj, private):
+        # returns the replacement for obj, and (if obj is a container)
+        # the (replacement, original) pair that still needs to be filled in
         if isinstance(obj, generic.IndirectObject):
             return generic.IndirectObject(
                 idnum=obj.idnum, generation=obj.generation, pdf=self
-            )
-        elif isinstance(obj, generic.StreamObject):
-            return generic.StreamObject({
-                k: self._subsume_object(v) for k, v in obj.items()
-            }, encoded_data=obj.encoded_data)
+            ), None
         elif isinstance(obj, generic.DictionaryObject):
-            return generic.DictionaryObject({
-                k: self._subsume_object(v) for k, v in obj.items()
-            })
+            contents = obj.values()
         elif isinstance(obj, generic.ArrayObject):
-            return generic.ArrayObject(
-                self._subsume_object(v) for v in obj
-            )
+            contents = obj
         else:
-            return obj
+            return obj, None
+
+        # Containers without references or other containers in them only
+        # need a shallow copy (if that), since their contents come out the
+        # same anyway. The copy makes sure that the historical view isn't
+        # affected by changes made through the reader later.
+        if not any(isinstance(v, _SUBSUMABLE) for v in contents):
+            if private:
+                return obj, None
+            elif isinstance(obj, generic.StreamObject):
+                return generic.StreamObject(
+                    obj, encoded_data=obj.encoded_data
+                ), None
+            elif isinstance(obj, generic.DictionaryObject):
+                return generic.DictionaryObject(obj), None
+            else:
+                return generic.ArrayObject(obj), None
+        if isinstance(obj, generic.StreamObject):
+            new = generic.StreamObject(encoded_data=obj.encoded_data)
+        elif isinstance(obj, generic.DictionaryObject):
+            new = generic.DictionaryObject()
+        else:
+            new = generic.ArrayObject()
+        return new, (new, obj)
 
     @property
     def root_ref(self) -> generic.Reference:
@@ -1216,48 +1557,113 @@ class HistoricalResolver(PdfHandler):
         self._collect_indirect_references(obj, result_set, since_revision)
         return result_set
 
+    @staticmethod
+    def _direct_child_refs(obj) -> List[generic.Reference]:
+        # references that occur in an object, not looking past any of them
+        refs = []
+        stack = [obj]
+        while stack:
+            obj = stack.pop()
+            if isinstance(obj, generic.IndirectObject):
+                refs.append(obj.reference)
+            elif isinstance(obj, generic.DictionaryObject):
+                stack.extend(obj.values())
+            elif isinstance(obj, generic.ArrayObject):
+                stack.extend(obj)
+        return refs
+
+    def _child_refs(self, ref: generic.Reference) -> List[generic.Reference]:
+        # The reference graph of a revision doesn't change, and the same parts
+        # of it tend to be walked many times over during difference analysis,
+        # so we remember the outgoing edges of every object we visit.
+        child_refs = self._child_refs_cache
+        try:
+            return child_refs[ref]
+        except KeyError:
+            result = child_refs[ref] = self._direct_child_refs(self(ref))
+            return result
+
     def _collect_indirect_references(self, obj, seen, since_revision=None):
-        if isinstance(obj, generic.IndirectObject):
-            ref = obj.reference
+        xrefs = self.reader.xrefs
+        stack = self._direct_child_refs(obj)
+        while stack:
+            ref = stack.pop()
             if ref in seen:
-                return
-            xrefs = self.reader.xrefs
+                continue
             relevant = (
                 since_revision is None
                 or xrefs.get_introducing_revision(ref) >= since_revision
             )
-            if relevant:
-                seen.add(ref)
-            elif since_revision is not None:
-                # do not recurse into objects that already existed before the
-                # target revision, since we won't (shouldn't!) find any new refs
-                # there.
-                return
-            obj = self(ref)
-        if isinstance(obj, generic.DictionaryObject):
-            for v in obj.values():
-                self._collect_indirect_references(v, seen, since_revision)
-        elif isinstance(obj, generic.ArrayObject):
-            for v in obj:
-                self._collect_indirect_references(v, seen, since_revision)
+            if not relevant:
+                # do not recurse into objects that already existed before
+                # the target revision, since we won't (shouldn't!) find
+                # any new refs there.
+                continue
+            seen.add(ref)
+            stack.extend(self._child_refs(ref))
 
     def _get_usages_of_ref(self, ref: generic.Reference) \
             -> Optional[Set[RawPdfPath]]:
         cache = self._indirect_object_access_cache or {}
         return cache.get(ref, None)
 
+    def _get_page_tree_nodes(self, pages_ref) -> FrozenSet[generic.Reference]:
+        # The page tree is usually the same across many revisions, so the
+        # result is shared between the resolvers of a reader, and reused as
+        # long as none of the objects it was derived from changed in between.
+        reader = self.reader
+        revision = self.revision
+        cache_key = None
+        if isinstance(pages_ref, generic.IndirectObject):
+            cache_key = pages_ref.reference
+            try:
+                cached_rev, nodes, deps = reader._page_tree_cache[cache_key]
+            except KeyError:
+                pass
+            else:
+                xrefs = reader.xrefs
+                lo, hi = sorted((cached_rev, revision))
+                if all(
+                    deps.isdisjoint(xrefs.explicit_refs_in_revision(rev))
+                    for rev in range(lo + 1, hi + 1)
+                ):
+                    return nodes
+
+        deps = set()
+
+        def _collect_page_tree_refs(pages_obj):
+            kids = pages_obj.raw_get('/Kids')
+            if isinstance(kids, generic.IndirectObject):
+                deps.add(kids.reference)
+            for kid in kids.get_object():
+                # should always be true, but hey
+                if isinstance(kid, generic.IndirectObject):
+                    yield kid.reference
+                kid = kid.get_object()
+                if kid.get('/Type', None) == '/Pages':
+                    yield from _collect_page_tree_refs(kid)
+
+        nodes = frozenset(
+            _collect_page_tree_refs(pages_obj=pages_ref.get_object())
+        )
+        if cache_key is not None:
+            deps.add(cache_key)
+            deps.update(nodes)
+            reader._page_tree_cache[cache_key] = (
+                revision, nodes, frozenset(deps)
+            )
+        return nodes
+
     def _load_reverse_xref_cache(self):
         if self._indirect_object_access_cache is not None:
             return
 
-        collected = defaultdict(set)
+        collected = defaultdict(list)
 
-        # internally, _compute_paths_to_refs works with singly linked lists
-        # to avoid having to create & destroy lots of list objects
-        # We flatten everything when we're done
-        def _compute_paths_to_refs(obj, cur_path: misc.ConsList,
-                                   seen_in_path: misc.ConsList, *,
-                                   is_page_tree, page_tree_objs):
+        # Paths are collected as tuples in forward order, in lists; they're
+        # only deduplicated and turned into RawPdfPath objects once the
+        # traversal is done.
+        def _compute_paths_to_refs(root_obj, page_tree_objs):
 
             # optimisation: page tree gets special treatment
             # to prevent unnecessary paths from being generated when the
@@ -1270,58 +1676,57 @@ class HistoricalResolver(PdfHandler):
             #  things are a bit more clear-cut, so we deal with those
             # separately.
 
-            if isinstance(obj, generic.IndirectObject):
-                ref = obj.reference
-                if ref in seen_in_path:
-                    return
-                collected[ref].add(cur_path)
-                seen_in_path = seen_in_path.cons(ref)
-                obj = self(ref)
-                if not is_page_tree and ref in page_tree_objs:
-                    return
-            if isinstance(obj, generic.DictionaryObject):
-                for k, v in obj.items():
-                    # another hack to eliminate some spurious extra paths
-                    # that don't convey any useful information
-                    if k == '/Parent':
+            # The traversal uses an explicit stack of
+            # (obj, depth, key, is_page_tree) tuples to avoid running into
+            # the recursion limit on deeply nested documents.
+            # The current path and the references seen along it are kept
+            # in lists that are truncated to the right depth whenever a new
+            # item is popped off the stack.
+            path = []
+            # for each node on the current path, the reference it was
+            # reached through (if any)
+            path_refs = []
+            seen_in_path = set()
+            stack = [(root_obj, 0, None, False)]
+            while stack:
+                obj, depth, key, is_page_tree = stack.pop()
+                while len(path_refs) > depth:
+                    seen_in_path.discard(path_refs.pop())
+                if depth:
+                    del path[depth - 1:]
+                    path.append(key)
+                ref = None
+                if isinstance(obj, generic.IndirectObject):
+                    ref = obj.reference
+                    if ref in seen_in_path:
                         continue
-
-                    _compute_paths_to_refs(
-                        v, cur_path.cons(k), seen_in_path,
-                        is_page_tree=is_page_tree or (
-                            cur_path.head == '/Root' and k == '/Pages'
-                            and cur_path.tail == misc.ConsList.empty()
-                        ),
-                        page_tree_objs=page_tree_objs
-                    )
-            elif isinstance(obj, generic.ArrayObject):
-                for ix, v in enumerate(obj):
-                    _compute_paths_to_refs(
-                        v, cur_path.cons(ix), seen_in_path,
-                        is_page_tree=is_page_tree,
-                        page_tree_objs=page_tree_objs
-                    )
-
-        def _collect_page_tree_refs(pages_obj):
-            for kid in pages_obj['/Kids']:
-                # should always be true, but hey
-                if isinstance(kid, generic.IndirectObject):
-                    yield kid.reference
-                kid = kid.get_object()
-                if kid.get('/Type', None) == '/Pages':
-                    yield from _collect_page_tree_refs(kid)
+                    collected[ref].append(tuple(path))
+                    if not is_page_tree and ref in page_tree_objs:
+                        continue
+                    seen_in_path.add(ref)
+                    obj = self(ref)
+                path_refs.append(ref)
+                depth += 1
+                if isinstance(obj, generic.DictionaryObject):
+                    at_root = len(path) == 1 and path[0] == '/Root'
+                    for k, v in obj.items():
+                        # another hack to eliminate some spurious extra paths
+                        if k in _PATH_SKIP_KEYS:
+                            continue
+
+                        stack.append((
+                            v, depth, k,
+                            is_page_tree or (at_root and k == '/Pages')
+                        ))
+                elif isinstance(obj, generic.ArrayObject):
+                    for ix, v in enumerate(obj):
+                        stack.append((v, depth, ix, is_page_tree))
 
         pages_ref = self.root.raw_get('/Pages')
-        page_tree_nodes = set()
-        page_tree_nodes.update(
-            _collect_page_tree_refs(pages_obj=pages_ref.get_object())
-        )
-        _compute_paths_to_refs(
-            self.trailer_view, misc.ConsList.empty(), misc.ConsList.empty(),
-            is_page_tree=False, page_tree_objs=page_tree_nodes
-        )
+        page_tree_nodes = self._get_page_tree_nodes(pages_ref)
+        _compute_paths_to_refs(self.trailer_view, page_tree_nodes)
 
         self._indirect_object_access_cache = {
-            ref: {RawPdfPath(*reversed(list(p))) for p in paths}
+            ref: {RawPdfPath(*path) for path in paths}
             for ref, paths in collected.items()
         }
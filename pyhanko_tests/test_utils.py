@@ -1,4 +1,5 @@
 import datetime
+import os
 from fractions import Fraction
 
 import pytest
@@ -9,7 +10,10 @@ import pytz
 from pyhanko.pdf_utils.generic import Reference
 from pyhanko.pdf_utils.incremental_writer import IncrementalPdfFileWriter
 from pyhanko.pdf_utils.layout import BoxSpecificationError, BoxConstraints
-from pyhanko.pdf_utils.reader import PdfFileReader
+from pyhanko.pdf_utils.reader import (
+    PdfFileReader, XRefCache, process_data_at_eof, read_object_header,
+    convert_to_int,
+)
 from pyhanko.pdf_utils import writer, generic, misc
 from fontTools import ttLib
 from pyhanko.pdf_utils.font import GlyphAccumulator, pdf_name
@@ -198,6 +202,96 @@ def test_mildly_malformed_xref_read():
     assert '/Pages' in root
 
 
+@pytest.mark.parametrize('data, expected', [
+    (b'blah\nstartxref\n123\n%%EOF\n', 123),
+    (b'x' * 3000 + b'\r\nstartxref\r\n 55\r\n%%EOF', 55),
+    (b'xx\nstartxref 77\n%%EOF\n\n', 77),
+    # the tail of this one doesn't fit in a single chunk
+    (b'a\nstartxref\n12\n%%EOF\n' + b'\n' * 1000 + b'z', 12),
+])
+def test_process_data_at_eof(data, expected):
+    stream = BytesIO(data)
+    stream.seek(-1, os.SEEK_END)
+    assert process_data_at_eof(stream) == expected
+
+
+@pytest.mark.parametrize('data', [
+    b'x\nfoo\n12\n%%EOF\n', b'a\nstartxref\n12\n%%EOF\n' + b'z' * 1100
+])
+def test_process_data_at_eof_error(data):
+    stream = BytesIO(data)
+    stream.seek(-1, os.SEEK_END)
+    with pytest.raises(misc.PdfReadError):
+        process_data_at_eof(stream)
+
+
+def test_trailer_flatten_cache():
+    r = PdfFileReader(BytesIO(MINIMAL))
+    trailer = r.trailer
+    flat = trailer.flatten()
+    assert '/Root' in flat and '/Foo' not in trailer
+    # modifying the result shouldn't affect the trailer
+    flat['/Foo'] = generic.NullObject()
+    assert '/Foo' not in trailer.flatten()
+
+    trailer['/Foo'] = generic.NumberObject(1)
+    assert trailer.flatten()['/Foo'] == 1
+    assert '/Foo' in trailer and '/Foo' in trailer.keys()
+    assert '/Foo' not in trailer.flatten(revision=0)
+    del trailer['/Foo']
+    assert '/Foo' not in trailer.flatten()
+    assert '/Foo' not in trailer
+
+
+def test_xref_generation_tracking():
+    xrefs = XRefCache(None)
+    xrefs.put_ref(5, 1, 100)
+    assert xrefs.used_later(5, 1)
+    assert not xrefs.used_later(5, 0)
+    assert not xrefs.used_later(6, 0)
+    with pytest.raises(misc.PdfReadError, match='Generation 1 of object 5'):
+        xrefs.free_ref(5, 3)
+    xrefs = XRefCache(None)
+    xrefs.put_ref(5, 1, 100)
+    xrefs.free_ref(5, 1)
+    assert xrefs.used_later(5, 0) and xrefs.used_later(5, 1)
+
+
+def test_xref_prev_cycle():
+    looping = MINIMAL.replace(b'/Size 5\n', b'/Size 5 /Prev 565\n')
+    with pytest.raises(misc.PdfReadError, match='Cycle'):
+        PdfFileReader(BytesIO(looping))
+
+
+@pytest.mark.parametrize('data, expected, pos', [
+    (b'12 0 obj\n<<>>', (12, 0), 9),
+    (b'%comment\n  12 0 obj <<', (12, 0), 20),
+    (b'\n\n12  3 obj\r\n<<', (12, 3), 13),
+    # too much whitespace for the fast path
+    (b'12 0 obj' + b' ' * 100 + b'x', (12, 0), 108),
+])
+def test_read_object_header(data, expected, pos):
+    stream = BytesIO(data)
+    assert read_object_header(stream, strict=False) == expected
+    assert stream.tell() == pos
+
+
+@pytest.mark.parametrize('data, expected', [
+    (b'\x01', 1), (b'\x00\xff', 255), (b'\xff' * 3, 0xffffff),
+    (b'\x01' + bytes(9), 1 << 72),
+])
+def test_convert_to_int(data, expected):
+    assert convert_to_int(data, len(data)) == expected
+
+
+def test_xref_stream_slightly_off():
+    # startxref points to the newline before the xref stream
+    data = MINIMAL_XREF.replace(b'startxref\n426', b'startxref\n425')
+    r = PdfFileReader(BytesIO(data))
+    assert r.xrefs.xref_locations == [425, 426]
+    assert '/Pages' in r.root
+
+
 def test_write_embedded_string_objstream():
     ffile = ttLib.TTFont(NOTO_SERIF_JP)
     ga = GlyphAccumulator(ffile)
@@ -234,6 +328,65 @@ def test_write_embedded_string_objstream():
     assert font['/Type'] == pdf_name('/Font')
 
 
+def test_objstream_batch_read():
+    w = IncrementalPdfFileWriter(BytesIO(MINIMAL_XREF))
+    obj_stream = w.prepare_object_stream()
+    refs = [
+        w.add_object(
+            generic.DictionaryObject({pdf_name('/X'): generic.NumberObject(i)}),
+            obj_stream=obj_stream
+        ).reference for i in range(5)
+    ]
+    w.update_root()
+    out = BytesIO()
+    w.write(out)
+
+    # overwrite one of them in a later revision
+    w = IncrementalPdfFileWriter(out)
+    ref = generic.Reference(refs[3].idnum, 0, w.prev)
+    ref.get_object()['/X'] = generic.NumberObject(1337)
+    w.mark_update(ref)
+    w.write_in_place()
+
+    r = PdfFileReader(out)
+    assert r.get_object(refs[0])['/X'] == 0
+    # the other objects in the stream should have been cached as well,
+    # except the one that was overridden later
+    assert r.cache_get_indirect_object(0, refs[4].idnum)['/X'] == 4
+    assert r.cache_get_indirect_object(0, refs[3].idnum) is None
+    for i, ref in enumerate(refs):
+        assert r.get_object(ref)['/X'] == (1337 if i == 3 else i)
+
+
+def test_objstream_batch_read_corrupt_sibling():
+    w = IncrementalPdfFileWriter(BytesIO(MINIMAL_XREF))
+    obj_stream = w.prepare_object_stream(compress=False)
+    good_ref = w.add_object(
+        generic.DictionaryObject({pdf_name('/X'): generic.NumberObject(1)}),
+        obj_stream=obj_stream
+    ).reference
+    bad_ref = w.add_object(
+        generic.DictionaryObject({
+            pdf_name('/A'): generic.NumberObject(1),
+            pdf_name('/B'): generic.NumberObject(2),
+        }),
+        obj_stream=obj_stream
+    ).reference
+    w.update_root()
+    out = BytesIO()
+    w.write(out)
+    # break the second object without moving anything around
+    data = out.getvalue()
+    assert data.count(b'/B 2') == 1
+    r = PdfFileReader(BytesIO(data.replace(b'/B 2', b'/B  ')))
+
+    # the broken sibling shouldn't prevent the good object from being read
+    assert r.get_object(good_ref) == {'/X': 1}
+    assert r.cache_get_indirect_object(0, bad_ref.idnum) is None
+    with pytest.raises(ValueError):
+        r.get_object(bad_ref)
+
+
 TEST_STRING = b'\x74\x77\x74\x84\x66'
 
 
@@ -279,6 +432,48 @@ def test_historical_read():
     assert Reference(2, 0) not in reader.xrefs.explicit_refs_in_revision(1)
 
 
+def test_page_tree_nodes_across_revisions():
+    w = IncrementalPdfFileWriter(BytesIO(MINIMAL))
+    new_page_ref = w.insert_page(simple_page(w, 'Hello world')).reference
+    out = BytesIO()
+    w.write(out)
+    out.seek(0)
+    w = IncrementalPdfFileWriter(out)
+    w.root['/Foo'] = generic.NameObject('/Bar')
+    w.update_root()
+    out = BytesIO()
+    w.write(out)
+
+    r = PdfFileReader(out)
+
+    def nodes(revision):
+        hist = r.get_historical_resolver(revision)
+        return hist._get_page_tree_nodes(hist.root.raw_get('/Pages'))
+
+    # the page tree didn't change in the last revision, so the result
+    # can be reused
+    assert nodes(2) is nodes(1)
+    assert new_page_ref in nodes(1)
+    assert new_page_ref not in nodes(0)
+    assert nodes(2) == nodes(1)
+
+
+def test_historical_view_isolated_from_reader():
+    r = PdfFileReader(BytesIO(MINIMAL))
+    ref = generic.Reference(4, 0, r)
+    hist = r.get_historical_resolver(0)
+    hist_obj = hist.get_object(ref)
+    assert '/Foo' not in hist_obj
+
+    # changes made through the reader after the fact shouldn't leak into
+    # the historical view
+    live_obj = r.get_object(ref)
+    assert live_obj is not hist_obj
+    live_obj['/Foo'] = generic.NameObject('/Bar')
+    assert '/Foo' not in hist_obj
+    assert '/Foo' not in hist.get_object(ref)
+
+
 # TODO actually attempt to render the XObjects
 
 @pytest.mark.parametrize('file_no, inherit_filters',
@@ -760,6 +955,104 @@ def test_wrong_password(legacy):
         r.get_object(ref.reference)
 
 
+@pytest.mark.parametrize("legacy", [True, False])
+def test_authenticate_after_failed_attempt(legacy):
+    w = writer.PdfFileWriter()
+    ref = w.add_object(generic.TextStringObject("Blah blah"))
+    if legacy:
+        sh = StandardSecurityHandler.build_from_pw_legacy(
+            StandardSecuritySettingsRevision.RC4_OR_AES128,
+            w._document_id[0].original_bytes, "ownersecret", "usersecret",
+            keylen_bytes=16, use_aes128=True
+        )
+    else:
+        sh = StandardSecurityHandler.build_from_pw("ownersecret", "usersecret")
+    w.security_handler = sh
+    w._encrypt = w.add_object(sh.as_pdf_object())
+    out = BytesIO()
+    w.write(out)
+    r = PdfFileReader(out)
+    sh = r.security_handler
+    id1 = r.document_id[0]
+    assert sh.authenticate("wrong", id1=id1) == AuthResult.FAILED
+    assert sh.authenticate("alsowrong", id1=id1) == AuthResult.FAILED
+    # a successful attempt should clear the failure state
+    assert sh.authenticate("usersecret", id1=id1) == AuthResult.USER
+    assert r.get_object(ref.reference) == "Blah blah"
+
+
+@pytest.mark.parametrize('perms,encrypt_metadata', [
+    (-4, True), (-8, True), (-4, False), (0xfffffffc, True)
+])
+def test_r6_perms_check(perms, encrypt_metadata):
+    from pyhanko.pdf_utils.crypt import SecurityHandlerVersion
+    sh = StandardSecurityHandler.build_from_pw("ownersecret", "usersecret")
+    sh = StandardSecurityHandler(
+        version=SecurityHandlerVersion.AES256,
+        revision=StandardSecuritySettingsRevision.AES256,
+        legacy_keylen=32, perm_flags=perms, odata=sh.odata, udata=sh.udata,
+        oeseed=sh.oeseed, ueseed=sh.ueseed,
+        encrypted_perms=sh.encrypted_perms, encrypt_metadata=encrypt_metadata
+    )
+    if encrypt_metadata and perms & 0xffffffff == 0xfffffffc:
+        assert sh.authenticate("usersecret") == AuthResult.USER
+    else:
+        with pytest.raises(misc.PdfError, match='tampered'):
+            sh.authenticate("usersecret")
+
+
+def test_authenticate_memo():
+    sh = StandardSecurityHandler.build_from_pw("ownersecret", b"")
+    calls = []
+    orig = sh._authenticate_r6
+
+    def _counting_auth(pw_bytes):
+        calls.append(pw_bytes)
+        return orig(pw_bytes)
+
+    sh._authenticate_r6 = _counting_auth
+    assert sh.authenticate(b"") == AuthResult.USER
+    assert sh.authenticate("wrong") == AuthResult.FAILED
+    assert sh.authenticate(b"") == AuthResult.USER
+    assert sh.get_file_encryption_key() is not None
+    assert sh.authenticate("wrong") == AuthResult.FAILED
+    # only the empty password is remembered
+    assert calls == [b'', b'wrong', b'wrong']
+
+
+def test_symmetric_helpers_agree_with_oscrypto():
+    from oscrypto import symmetric
+    from pyhanko.pdf_utils import _symmetric
+    key = bytes(range(32))
+    iv = bytes(range(16, 32))
+    data = b'0123456789abcdef' * 5
+    for keylen in (16, 32):
+        assert _symmetric.aes_cbc_no_padding_encrypt(key[:keylen], data, iv) \
+            == symmetric.aes_cbc_no_padding_encrypt(key[:keylen], data, iv)
+        assert _symmetric.aes_cbc_no_padding_decrypt(key[:keylen], data, iv) \
+            == symmetric.aes_cbc_no_padding_decrypt(key[:keylen], data, iv)
+        _, ct = _symmetric.aes_cbc_pkcs7_encrypt(key[:keylen], data[:-3], iv)
+        assert ct == symmetric.aes_cbc_pkcs7_encrypt(
+            key[:keylen], data[:-3], iv
+        )[1]
+        assert _symmetric.aes_cbc_pkcs7_decrypt(key[:keylen], ct, iv) \
+            == data[:-3]
+        block = data[:16]
+        ecb_ct = _symmetric.aes_ecb_encrypt_block(key[:keylen], block)
+        assert ecb_ct == _symmetric._oscrypto_aes_ecb_encrypt_block(
+            key[:keylen], block
+        )
+        assert _symmetric.aes_ecb_decrypt_block(key[:keylen], ecb_ct) == block
+        assert _symmetric._oscrypto_aes_ecb_decrypt_block(
+            key[:keylen], ecb_ct
+        ) == block
+    for keylen in (5, 16):
+        assert _symmetric.rc4_encrypt(key[:keylen], data) \
+            == symmetric.rc4_encrypt(key[:keylen], data)
+    with pytest.raises(ValueError):
+        _symmetric.aes_cbc_no_padding_encrypt(key[:16], b'abc', iv)
+
+
 def test_identity_crypt_filter_api():
 
     # confirm that the CryptFilter API of the identity filter doesn't do
@@ -1163,6 +1456,53 @@ def test_load_pkcs12():
         "pyhanko_tests/data/crypto/selfsigned.pfx", b'exportsecret'
     )
     assert sedk.cert.subject == PUBKEY_TEST_DECRYPTER.cert.subject
+    assert sedk.cert.dump() == PUBKEY_TEST_DECRYPTER.cert.dump()
+
+    from pyhanko.pdf_utils.crypt import (
+        construct_recipient_cms, read_seed_from_recipient_cms
+    )
+    seed = bytes(range(20))
+    recp_cms = construct_recipient_cms([sedk.cert], seed, -4)
+    assert read_seed_from_recipient_cms(recp_cms, sedk) == seed
+    # the private key should be of the same type regardless of how the
+    # decrypter was loaded
+    assert type(sedk.private_key) is type(PUBKEY_TEST_DECRYPTER.private_key)
+
+
+def test_load_pkcs12_no_key():
+    from cryptography import x509 as crypto_x509
+    from cryptography.hazmat.primitives.serialization import (
+        pkcs12, NoEncryption
+    )
+    from pyhanko.pdf_utils import _asymmetric
+    cert = crypto_x509.load_der_x509_certificate(
+        PUBKEY_TEST_DECRYPTER.cert.dump()
+    )
+    pfx_bytes = pkcs12.serialize_key_and_certificates(
+        b'test', None, cert, None, NoEncryption()
+    )
+    with pytest.raises(ValueError, match='private key'):
+        _asymmetric.load_pkcs12(pfx_bytes)
+
+
+def test_rsa_helpers_agree_with_oscrypto():
+    from oscrypto import asymmetric
+    from pyhanko.pdf_utils import _asymmetric
+    cert = PUBKEY_TEST_DECRYPTER.cert
+    private_key = PUBKEY_TEST_DECRYPTER.private_key
+    data = bytes(range(32))
+    ciphertext = _asymmetric.rsa_pkcs1v15_encrypt(
+        _asymmetric.load_rsa_public_key(cert.public_key), data
+    )
+    assert asymmetric.rsa_pkcs1v15_decrypt(private_key, ciphertext) == data
+    ciphertext = asymmetric.rsa_pkcs1v15_encrypt(
+        asymmetric.load_public_key(cert.public_key), data
+    )
+    loaded = _asymmetric.load_rsa_private_key(private_key)
+    assert _asymmetric.rsa_pkcs1v15_decrypt(loaded, ciphertext) == data
+    # also works with an asn1crypto private key
+    loaded = _asymmetric.load_rsa_private_key(private_key.asn1)
+    assert _asymmetric.rsa_pkcs1v15_decrypt(loaded, ciphertext) == data
 
 
 def test_pubkey_wrong_cert():